@@ -0,0 +1,241 @@
+"""On-disk storage for batch verification results.
+
+Each batch is an append-only NDJSON file (one result record per line) plus a
+small meta JSON. Records are written as they are produced, so server memory
+does not grow with batch size. Two sidecars make paging independent of batch
+size: `.idx` holds each record's byte offset (fixed-width, so page N is a
+seek) and `.keys.ndjson` holds each record's overall and per-check statuses,
+so filters and the CSV header never parse the full records (thumbnails
+included). Batches older than BATCH_TTL_S are deleted when a new batch starts.
+"""
+
+from __future__ import annotations
+
+import csv
+import io
+import json
+import os
+import re
+import struct
+import tempfile
+import time
+import uuid
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+_BATCH_ID_RE = re.compile(r"^[0-9a-f]{32}$")
+_OFFSET = struct.Struct("<q")
+_SUFFIXES = (".ndjson", ".idx", ".keys.ndjson", ".meta.json", ".meta.json.tmp")
+
+
+def _store_root() -> str:
+    return os.getenv("BATCH_STORE_DIR", os.path.join(tempfile.gettempdir(), "alv_batches"))
+
+
+def _record_keys(rec: Dict[str, Any]) -> Dict[str, Any]:
+    """Filterable summary of a record: overall status and status per check."""
+    res = rec.get("result") or {}
+    return {"s": res.get("overall_status"), "c": {i.get("field"): i.get("status") for i in res.get("items") or []}}
+
+
+def _keys_match(keys: Dict[str, Any], status: Optional[str], failing_field: Optional[str]) -> bool:
+    if status and keys.get("s") != status:
+        return False
+    if failing_field and keys["c"].get(failing_field, "PASS") == "PASS":
+        return False
+    return True
+
+
+def sweep_batches(root: Optional[str] = None, max_age_s: Optional[float] = None) -> int:
+    """Delete batches not written for max_age_s (default BATCH_TTL_S, 24h). Returns how many."""
+    root = root or _store_root()
+    if max_age_s is None:
+        max_age_s = float(os.getenv("BATCH_TTL_S", "86400"))
+    try:
+        names = os.listdir(root)
+    except OSError:
+        return 0
+    cutoff = time.time() - max_age_s
+    removed = 0
+    for name in names:
+        batch_id, ext = name.split(".", 1) if "." in name else (name, "")
+        if ext != "ndjson" or not _BATCH_ID_RE.match(batch_id):
+            continue
+        try:
+            if os.path.getmtime(os.path.join(root, name)) >= cutoff:
+                continue
+        except OSError:
+            continue
+        for suffix in _SUFFIXES:
+            try:
+                os.remove(os.path.join(root, batch_id + suffix))
+            except OSError:
+                pass
+        removed += 1
+    return removed
+
+
+class BatchStore:
+    """Append-only NDJSON result file for a single batch."""
+
+    def __init__(self, batch_id: str, root: Optional[str] = None):
+        if not _BATCH_ID_RE.match(batch_id or ""):
+            raise KeyError(batch_id)
+        self.batch_id = batch_id
+        self.root = root or _store_root()
+        self.path = os.path.join(self.root, f"{batch_id}.ndjson")
+        self.meta_path = os.path.join(self.root, f"{batch_id}.meta.json")
+        self.index_path = os.path.join(self.root, f"{batch_id}.idx")
+        self.keys_path = os.path.join(self.root, f"{batch_id}.keys.ndjson")
+        self._fh = self._idx = self._keys = None
+        self.count = 0
+
+    @classmethod
+    def create(cls, root: Optional[str] = None) -> "BatchStore":
+        store = cls(uuid.uuid4().hex, root=root)
+        os.makedirs(store.root, exist_ok=True)
+        sweep_batches(store.root)
+        store._fh = open(store.path, "ab")
+        store._idx = open(store.index_path, "ab")
+        store._keys = open(store.keys_path, "a", encoding="utf-8")
+        store._write_meta(status="running")
+        return store
+
+    @classmethod
+    def open(cls, batch_id: str, root: Optional[str] = None) -> "BatchStore":
+        """Open an existing batch for reading. Raises KeyError if unknown."""
+        store = cls(batch_id, root=root)
+        if not os.path.exists(store.path):
+            raise KeyError(batch_id)
+        store.count = store.meta().get("count", 0)
+        if not os.path.exists(store.index_path):
+            store._build_index()
+        return store
+
+    def _build_index(self) -> None:
+        # Batches written before the sidecars existed: index them once.
+        with open(self.path, "rb") as f, open(self.index_path + ".tmp", "wb") as idx, open(self.keys_path, "w", encoding="utf-8") as keys:
+            offset = 0
+            for line in f:
+                if line.strip():
+                    idx.write(_OFFSET.pack(offset))
+                    keys.write(json.dumps(_record_keys(json.loads(line)), separators=(",", ":")) + "\n")
+                offset += len(line)
+        os.replace(self.index_path + ".tmp", self.index_path)
+
+    def _write_meta(self, status: str) -> None:
+        meta = {"batch_id": self.batch_id, "status": status, "count": self.count, "updated": time.time()}
+        tmp = self.meta_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(tmp, self.meta_path)
+
+    def meta(self) -> Dict[str, Any]:
+        try:
+            with open(self.meta_path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {"batch_id": self.batch_id, "status": "unknown", "count": 0}
+
+    def append(self, record: Dict[str, Any]) -> None:
+        if self._fh is None:
+            raise RuntimeError("batch store is not open for writing")
+        offset = self._fh.tell()
+        self._fh.write((json.dumps({"index": self.count, **record}, separators=(",", ":")) + "\n").encode("utf-8"))
+        self._fh.flush()
+        # The record is on disk before its index entry, so readers never see a partial line.
+        self._keys.write(json.dumps(_record_keys(record), separators=(",", ":")) + "\n")
+        self._keys.flush()
+        self._idx.write(_OFFSET.pack(offset))
+        self._idx.flush()
+        self.count += 1
+
+    def close(self, status: str = "complete") -> None:
+        """Stop writing and record the final status ("complete", or "failed" if the batch aborted)."""
+        if self._fh is not None:
+            for fh in (self._fh, self._keys, self._idx):
+                fh.close()
+            self._fh = self._idx = self._keys = None
+            self._write_meta(status=status)
+
+    def _indexed(self) -> int:
+        try:
+            return os.path.getsize(self.index_path) // _OFFSET.size
+        except OSError:
+            return 0
+
+    def _iter_keys(self) -> Iterator[Dict[str, Any]]:
+        n = self._indexed()
+        with open(self.keys_path, encoding="utf-8") as f:
+            for _, line in zip(range(n), f):
+                yield json.loads(line)
+
+    def _matching(self, status: Optional[str], failing_field: Optional[str]) -> List[int]:
+        return [i for i, keys in enumerate(self._iter_keys()) if _keys_match(keys, status, failing_field)]
+
+    def _read(self, indexes: Iterable[int]) -> List[Dict[str, Any]]:
+        """Records at the given positions, read by seeking via the offset index."""
+        out: List[Dict[str, Any]] = []
+        with open(self.index_path, "rb") as idx, open(self.path, "rb") as f:
+            for i in indexes:
+                idx.seek(i * _OFFSET.size)
+                f.seek(_OFFSET.unpack(idx.read(_OFFSET.size))[0])
+                out.append(json.loads(f.readline()))
+        return out
+
+    def iter_records(self, status: Optional[str] = None, failing_field: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        filtered = bool(status or failing_field)
+        keys = self._iter_keys()
+        with open(self.path, encoding="utf-8") as f:
+            for _, line in zip(range(self._indexed()), f):
+                if filtered and not _keys_match(next(keys), status, failing_field):
+                    continue
+                yield json.loads(line)
+
+    def page(self, offset: int = 0, limit: int = 100, status: Optional[str] = None, failing_field: Optional[str] = None) -> Dict[str, Any]:
+        """Return one page of (optionally filtered) records plus the match total.
+
+        Unfiltered pages cost O(limit); filtered pages scan only the keys sidecar.
+        """
+        offset, limit = max(0, offset), max(1, limit)
+        if status or failing_field:
+            matches = self._matching(status, failing_field)
+            total, wanted = len(matches), matches[offset:offset + limit]
+        else:
+            total = self._indexed()
+            wanted = range(offset, min(total, offset + limit))
+        results = self._read(wanted)
+        next_offset = offset + limit if offset + limit < total else None
+        return {"batch_id": self.batch_id, "total": total, "offset": offset, "limit": limit, "next_offset": next_offset, "results": results}
+
+    def check_fields(self, status: Optional[str] = None, failing_field: Optional[str] = None) -> List[str]:
+        """Check fields present in the (filtered) results, in first-seen order."""
+        fields: Dict[str, None] = {}
+        for keys in self._iter_keys():
+            if _keys_match(keys, status, failing_field):
+                fields.update(dict.fromkeys(keys["c"]))
+        return list(fields)
+
+    def iter_csv(self, status: Optional[str] = None, failing_field: Optional[str] = None) -> Iterator[str]:
+        """Yield CSV text (header first) one row at a time."""
+        buf = io.StringIO()
+        writer = csv.writer(buf)
+
+        def flush() -> str:
+            out = buf.getvalue()
+            buf.seek(0)
+            buf.truncate(0)
+            return out
+
+        # One status column per check that appears in the exported results.
+        check_fields = self.check_fields(status=status, failing_field=failing_field)
+        writer.writerow(["index", "folder", "label_filename", "brand_name", "abv", "net_contents", "overall_status"] + [f"{f}_status" for f in check_fields])
+        yield flush()
+        for rec in self.iter_records(status=status, failing_field=failing_field):
+            app = rec.get("application") or {}
+            res = rec.get("result") or {}
+            by_field = {i.get("field"): i.get("status") for i in res.get("items") or []}
+            writer.writerow(
+                [rec.get("index"), rec.get("folder"), rec.get("label_filename"), app.get("brand_name"), app.get("abv"), app.get("net_contents"), res.get("overall_status")]
+                + [by_field.get(f, "") for f in check_fields]
+            )
+            yield flush()
@@ -0,0 +1,212 @@
+"""Persistent index of registered brand names (from application JSONs).
+
+Used to resolve OCR'd brand candidates to the closest registered brand and to
+flag labels that show a different registered brand than the application.
+
+Lookups go exact normalized match -> BK-tree (Levenshtein) -> trigram
+candidates. The index is persisted as an append-only NDJSON file under
+DATA_DIR (or BRAND_INDEX_PATH) and updated incrementally as new applications
+are verified. Lines other processes append to the same file (e.g. worker
+nodes sharing it) are picked up within REFRESH_S.
+
+The structures are copy-on-write: register publishes a new snapshot, and
+resolve searches whichever snapshot was current without taking the lock, so
+concurrent batch workers do not serialize on lookups.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from rapidfuzz import fuzz
+from rapidfuzz.distance import Levenshtein
+
+from .utils import normalize_text
+
+# Minimum similarity for a candidate to count as a registered brand.
+RESOLVE_MIN_SCORE = 0.85
+# How often resolve checks the index file for brands registered elsewhere.
+REFRESH_S = 1.0
+
+Node = Tuple[str, Dict[int, "Node"]]  # BK-tree node: (word, {distance: child})
+
+
+def _trigrams(s: str) -> Set[str]:
+    padded = f"  {s} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _bk_insert(node: Optional[Node], word: str) -> Node:
+    """Return a BK-tree (Levenshtein) with word added, copying only the path to it."""
+    if node is None:
+        return (word, {})
+    d = Levenshtein.distance(word, node[0])
+    if d == 0:
+        return node
+    children = dict(node[1])
+    children[d] = _bk_insert(children.get(d), word)
+    return (node[0], children)
+
+
+def _bk_search(root: Optional[Node], word: str, max_dist: int) -> List[Tuple[int, str]]:
+    if root is None:
+        return []
+    out = []
+    stack = [root]
+    while stack:
+        node_word, children = stack.pop()
+        d = Levenshtein.distance(word, node_word)
+        if d <= max_dist:
+            out.append((d, node_word))
+        for k, child in children.items():
+            if d - max_dist <= k <= d + max_dist:
+                stack.append(child)
+    return out
+
+
+class BrandIndex:
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self._lock = threading.Lock()
+        # (normalized -> brand as submitted, BK-tree root, trigram -> normalized brands).
+        # Never mutated once published; _extend swaps in a new tuple.
+        self._state: Tuple[Dict[str, str], Optional[Node], Dict[str, Set[str]]] = ({}, None, {})
+        self._offset = 0  # bytes of the index file already loaded
+        self._checked = 0.0
+
+    def __len__(self) -> int:
+        return len(self._state[0])
+
+    def load(self) -> "BrandIndex":
+        with self._lock:
+            self._refresh()
+        return self
+
+    def _refresh(self) -> None:
+        """Add brands appended to the file since the last read. Caller holds the lock."""
+        self._checked = time.time()
+        if not self.path:
+            return
+        try:
+            with open(self.path, "rb") as f:
+                f.seek(self._offset)
+                data = f.read()
+        except OSError:
+            return
+        # Leave a line another process is still writing for the next refresh.
+        data = data[: data.rfind(b"\n") + 1]
+        self._offset += len(data)
+        names = []
+        for line in data.splitlines():
+            try:
+                names.append(json.loads(line)["brand_name"])
+            except (ValueError, KeyError, TypeError):
+                continue
+        self._extend(names)
+
+    def _extend(self, names: Iterable[str]) -> List[str]:
+        """Publish a snapshot with names added; returns the names that were new. Caller holds the lock."""
+        display, root, grams = self._state
+        new_display: Optional[Dict[str, str]] = None
+        copied: Set[str] = set()
+        added = []
+        for name in names:
+            norm = normalize_text(name or "")
+            if not norm or norm in (new_display or display):
+                continue
+            if new_display is None:
+                new_display, grams = dict(display), dict(grams)
+            new_display[norm] = name.strip()
+            root = _bk_insert(root, norm)
+            for g in _trigrams(norm):
+                if g not in copied:
+                    grams[g] = set(grams.get(g, ()))
+                    copied.add(g)
+                grams[g].add(norm)
+            added.append(name.strip())
+        if new_display is not None:
+            self._state = (new_display, root, grams)
+        return added
+
+    def register(self, brand_name: str) -> bool:
+        """Add a brand and persist it. Returns True if it was new."""
+        norm = normalize_text(brand_name or "")
+        if not norm or norm in self._state[0]:
+            return False
+        with self._lock:
+            self._refresh()
+            added = bool(self._extend([brand_name]))
+            if added and self.path:
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                # One write on an O_APPEND handle, so lines from several processes do not interleave.
+                # The line is read back (as a duplicate) by the next refresh.
+                with open(self.path, "ab") as f:
+                    f.write((json.dumps({"brand_name": brand_name.strip()}) + "\n").encode("utf-8"))
+        return added
+
+    def resolve(self, text: str) -> Tuple[Optional[str], float]:
+        """Return (registered brand, similarity) closest to an OCR'd text, or (None, 0.0)."""
+        q = normalize_text(text or "")
+        if not q:
+            return None, 0.0
+        if self.path and time.time() - self._checked >= REFRESH_S:
+            with self._lock:
+                self._refresh()
+        display, root, grams = self._state
+        if not display:
+            return None, 0.0
+        if q in display:
+            return display[q], 1.0
+
+        best, best_score = None, 0.0
+        max_dist = max(1, int(len(q) * (1.0 - RESOLVE_MIN_SCORE) + 0.5))
+        for _, norm in _bk_search(root, q, max_dist):
+            s = fuzz.ratio(q, norm) / 100.0
+            if s > best_score:
+                best, best_score = norm, s
+
+        if best_score < RESOLVE_MIN_SCORE:
+            # Partial reads ("STONES" for "STONES THROW"): rank by shared trigrams.
+            counts: Dict[str, int] = {}
+            for g in _trigrams(q):
+                for norm in grams.get(g, ()):
+                    counts[norm] = counts.get(norm, 0) + 1
+            for norm, _ in sorted(counts.items(), key=lambda kv: kv[1], reverse=True)[:5]:
+                # token_set_ratio scores any subset as 1.0, so only use it for comparable lengths
+                if min(len(q), len(norm)) / max(len(q), len(norm)) >= 0.60:
+                    s = fuzz.token_set_ratio(q, norm) / 100.0
+                else:
+                    s = fuzz.ratio(q, norm) / 100.0
+                if s > best_score:
+                    best, best_score = norm, s
+
+        if best is None or best_score < RESOLVE_MIN_SCORE:
+            return None, 0.0
+        return display[best], best_score
+
+_INDEX: Optional[BrandIndex] = None
+_INDEX_LOCK = threading.Lock()
+
+
+def data_dir() -> str:
+    """Directory for state that must outlive the container (mount a volume here)."""
+    return os.getenv("DATA_DIR", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data"))
+
+
+def get_brand_index() -> BrandIndex:
+    """Return the process-wide brand index, loading it from disk on first use.
+
+    BRAND_INDEX_PATH overrides the default DATA_DIR/brand_index.ndjson; point
+    every node at the same file to share one index.
+    """
+    global _INDEX
+    if _INDEX is None:
+        with _INDEX_LOCK:
+            if _INDEX is None:
+                path = os.getenv("BRAND_INDEX_PATH") or os.path.join(data_dir(), "brand_index.ndjson")
+                _INDEX = BrandIndex(path).load()
+    return _INDEX
@@ -3,7 +3,9 @@ from .models import ApplicationFields, ExtractedFields, CheckItem
 import re
 import unicodedata
 
-from .utils import normalize_abv, normalize_net_contents
+from .utils import normalize_text
+from .rules import get_rules, status_from_score
+from .thresholds import get_thresholds
 
 # Canonical TTB warning text (commonly required). OCR is noisy, so we enforce
 # a strict-but-OCR-aware match using header + required clauses with high similarity.
@@ -31,55 +33,85 @@ def _extract_warning_block(ocr_text: str) -> str:
     start = m.start()
     return ocr_text[start:start + 900]
 
-def _gov_warning_strict_status(ocr_text: str) -> tuple[str, float, str]:
-    """Return (status, confidence, notes) for government warning strictness.
+_CLAUSE1_N = _normalize_warning_text(
+    "According to the Surgeon General women should not drink alcoholic beverages during pregnancy because of the risk of birth defects"
+)
+_CLAUSE2_N = _normalize_warning_text(
+    "Consumption of alcoholic beverages impairs your ability to drive a car or operate machinery and may cause health problems"
+)
+_EXPECTED_N = _normalize_warning_text(TTB_WARNING_EXPECTED)
 
-    Status: PASS | REVIEW | FAIL
-    Confidence: 0..1
+def warning_scores(ocr_text: str) -> dict | None:
+    """Raw government-warning evidence, or None when no warning block is found.
+
+    Returns header_ok (all caps + colon), header_present, and partial-ratio
+    similarities clause1, clause2 and full (0..1). Used by the strict status
+    below and by the offline threshold tuner.
     """
     block = _extract_warning_block(ocr_text)
     if not block:
-        return "FAIL", 0.0, "No GOVERNMENT WARNING block detected"
-
-    # Header: must be all caps + colon. OCR can't verify bold reliably.
-    header_ok = bool(re.search(r"\bGOVERNMENT\s+WARNING:\b", block))
-    header_present = bool(re.search(r"\bGOVERNMENT\s+WARNING\b", block))
+        return None
 
     block_n = _normalize_warning_text(block)
-    expected_n = _normalize_warning_text(TTB_WARNING_EXPECTED)
+    return {
+        # Header: must be all caps + colon. OCR can't verify bold reliably.
+        "header_ok": bool(re.search(r"\bGOVERNMENT\s+WARNING:\b", block)),
+        "header_present": bool(re.search(r"\bGOVERNMENT\s+WARNING\b", block)),
+        "clause1": fuzz.partial_ratio(_CLAUSE1_N, block_n) / 100.0 if block_n else 0.0,
+        "clause2": fuzz.partial_ratio(_CLAUSE2_N, block_n) / 100.0 if block_n else 0.0,
+        "full": fuzz.partial_ratio(_EXPECTED_N, block_n) / 100.0 if block_n else 0.0,
+    }
 
-    clause1_n = _normalize_warning_text(
-        "According to the Surgeon General women should not drink alcoholic beverages during pregnancy because of the risk of birth defects"
-    )
-    clause2_n = _normalize_warning_text(
-        "Consumption of alcoholic beverages impairs your ability to drive a car or operate machinery and may cause health problems"
-    )
+def _gov_warning_strict_status(ocr_text: str) -> tuple[str, float, str]:
+    """Return (status, confidence, notes) for government warning strictness.
 
-    c1 = fuzz.partial_ratio(clause1_n, block_n) / 100.0 if clause1_n and block_n else 0.0
-    c2 = fuzz.partial_ratio(clause2_n, block_n) / 100.0 if clause2_n and block_n else 0.0
-    full_sim = fuzz.partial_ratio(expected_n, block_n) / 100.0 if expected_n and block_n else 0.0
+    Status: PASS | REVIEW | FAIL
+    Confidence: 0..1
+    Thresholds come from get_thresholds()["government_warning"].
+    """
+    scores = warning_scores(ocr_text)
+    if scores is None:
+        return "FAIL", 0.0, "No GOVERNMENT WARNING block detected"
+
+    th = get_thresholds()["government_warning"]
+    header_ok, c1, c2, full_sim = scores["header_ok"], scores["clause1"], scores["clause2"], scores["full"]
 
     # PASS: strong evidence for header + both clauses + high similarity
-    if header_ok and c1 >= 0.92 and c2 >= 0.92 and full_sim >= 0.88:
+    if header_ok and c1 >= th["clause"] and c2 >= th["clause"] and full_sim >= th["full"]:
         conf = min(1.0, (c1 + c2 + full_sim) / 3.0)
         return "PASS", conf, f"Header OK; clause1={c1:.2f} clause2={c2:.2f} full={full_sim:.2f}"
 
     # REVIEW: warning present but OCR differs / partial clause coverage
-    if header_present and (c1 >= 0.80 or c2 >= 0.80):
+    if scores["header_present"] and (c1 >= th["review"] or c2 >= th["review"]):
         conf = max(c1, c2, full_sim)
         return "REVIEW", conf, f"Warning detected but not exact; header_colon={header_ok}; clause1={c1:.2f} clause2={c2:.2f} full={full_sim:.2f}"
 
     return "FAIL", max(c1, c2, full_sim), f"Warning text insufficient; header_colon={header_ok}; clause1={c1:.2f} clause2={c2:.2f} full={full_sim:.2f}"
 
-
-def _status_from_score(score: float, pass_th: float, review_th: float) -> str:
-    if score >= pass_th:
-        return "PASS"
-    if score >= review_th:
-        return "REVIEW"
-    return "FAIL"
-
-def compare(app: ApplicationFields, ext: ExtractedFields) -> list[CheckItem]:
+def warning_text(ext: ExtractedFields) -> str:
+    # Build a single OCR text string for matching from reading-order paragraphs,
+    # so a warning wrapped across columns is read contiguously.
+    # (Using all text is more reliable than only the header candidate.)
+    paras = ext.paragraphs or ext.all_text
+    return "\n".join([tb.text for tb in paras]) if paras else ""
+
+
+def _registered_brand_mismatch(app: ApplicationFields, ext: ExtractedFields, brand_index) -> str | None:
+    """Return a note if a top brand candidate resolves to a different registered brand."""
+    expected_n = normalize_text(app.brand_name)
+    for tb in ext.brand_candidates[:5]:
+        registered, score = brand_index.resolve(tb.text)
+        if registered and normalize_text(registered) != expected_n:
+            return f"Label shows registered brand '{registered}' ({score:.2f}) instead of '{app.brand_name}'"
+    return None
+
+def compare(app: ApplicationFields, ext: ExtractedFields, brand_index=None, rule_timings_us: dict | None = None) -> list[CheckItem]:
+    """Compare application fields against extracted label text.
+
+    brand_index (optional BrandIndex) enables flagging labels that show a
+    different registered brand when the expected brand does not PASS.
+    rule_timings_us (optional dict) receives per-rule scoring time in microseconds.
+    """
     items: list[CheckItem] = []
 
     # Brand
@@ -88,60 +120,30 @@ def compare(app: ApplicationFields, ext: ExtractedFields) -> list[CheckItem]:
     if best is None:
         items.append(CheckItem(field="brand_name", status="MISSING", expected=app.brand_name, notes="No brand candidates found"))
     else:
-        st = _status_from_score(score, pass_th=0.85, review_th=0.70)
+        th = get_thresholds()["brand_name"]
+        st = status_from_score(score, pass_th=th["pass"], review_th=th["review"])
+        notes = f"Brand match via {reason}"
+        if st != "PASS" and brand_index is not None:
+            mismatch = _registered_brand_mismatch(app, ext, brand_index)
+            if mismatch:
+                notes = f"{notes}; {mismatch}"
         items.append(CheckItem(
             field="brand_name",
             status=st,
             expected=app.brand_name,
             found=best.text,
             confidence=round(score, 3),
-            notes=f"Brand match via {reason}",
+            notes=notes,
             bbox_ids=[best.id]
         ))
 
-    # ABV
-    if app.abv:
-        exp_abv = normalize_abv(app.abv)
-        best_tb = None
-        best_score = 0.0
-        for tb in ext.abv_candidates:
-            found = normalize_abv(tb.text)
-            if not found or not exp_abv:
-                continue
-            # exact normalized match is best
-            s = 1.0 if found == exp_abv else (fuzz.ratio(exp_abv, found) / 100.0)
-            if s > best_score:
-                best_score, best_tb = s, tb
-
-        if not best_tb:
-            items.append(CheckItem(field="abv", status="MISSING", expected=app.abv, notes="No ABV detected"))
-        else:
-            st = _status_from_score(best_score, pass_th=0.95, review_th=0.80)
-            items.append(CheckItem(field="abv", status=st, expected=app.abv, found=best_tb.text, confidence=round(best_score, 3), bbox_ids=[best_tb.id]))
-
-    # Net contents
-    if app.net_contents:
-        exp = normalize_net_contents(app.net_contents)
-        best_tb = None
-        best_score = 0.0
-        for tb in ext.net_contents_candidates:
-            found = normalize_net_contents(tb.text)
-            s = (fuzz.ratio(exp, found) / 100.0) if exp and found else 0.0
-            if s > best_score:
-                best_score, best_tb = s, tb
-
-        if not best_tb:
-            items.append(CheckItem(field="net_contents", status="MISSING", expected=app.net_contents, notes="No net contents detected"))
-        else:
-            st = _status_from_score(best_score, pass_th=0.90, review_th=0.75)
-            items.append(CheckItem(field="net_contents", status=st, expected=app.net_contents, found=best_tb.text, confidence=round(best_score, 3), bbox_ids=[best_tb.id]))
+    # Declarative field rules (ABV, net contents, class/type, producer, ...),
+    # evaluated together in one pass over the lines; see rules.py / rules.json.
+    items.extend(get_rules().evaluate(app, ext.all_text, rule_timings_us=rule_timings_us))
 
     # Government warning (strict-but-OCR-aware)
     if app.require_gov_warning:
-        # Build a single OCR text string for matching.
-        # (Using all_text is more reliable than only the header candidate.)
-        ocr_text = "\n".join([tb.text for tb in ext.all_text]) if ext.all_text else ""
-        st, conf, notes = _gov_warning_strict_status(ocr_text)
+        st, conf, notes = _gov_warning_strict_status(warning_text(ext))
         if st == "PASS":
             ids = [tb.id for tb in ext.warning_candidates[:3]] if ext.warning_candidates else []
             found = ext.warning_candidates[0].text if ext.warning_candidates else "GOVERNMENT WARNING"
@@ -3,7 +3,13 @@ from typing import List, Tuple
 from rapidfuzz import fuzz
 from .models import TextBox, ExtractedFields
 from .utils import normalize_text
+from .layout import band_row, paragraph_boxes
 
+# Brand candidates are lines whose top is in this top fraction of the label.
+BRAND_REGION_END = 0.4
+
+# ABV / net contents candidate patterns. Matching happens in the abv and
+# net_contents rules (rules.json), which use these same patterns.
 ABV_RE = re.compile(r"(\d{1,2}(?:\.\d)?)\s*%(\s*abv)?", re.IGNORECASE)
 NET_RE = re.compile(r"(\d+)\s*(ml|mL|ML|l|L|oz|fl\.?\s*oz|cl)", re.IGNORECASE)
 
@@ -18,32 +24,24 @@ def is_gov_warning(text: str) -> bool:
     return fuzz.partial_ratio(t, "government warning") >= 85
 
 def extract_fields(all_text: List[TextBox], image_w: int = 1000, image_h: int = 1000) -> ExtractedFields:
-    abv, net, warn = [], [], []
-    for tb in all_text:
-        t = tb.text
-        if ABV_RE.search(t):
-            abv.append(tb)
-        if NET_RE.search(t):
-            net.append(tb)
-        if is_gov_warning(t):
-            warn.append(tb)
+    warn = [tb for tb in all_text if is_gov_warning(tb.text)]
 
     # Brand candidates: top region + larger height + high conf
     brand_candidates = []
+    brand_bottom = band_row(BRAND_REGION_END, image_h)
     for tb in all_text:
         x, y, w, h = tb.bbox
-        if y <= 0.4 * image_h:
+        if y < brand_bottom:
             score = (h * 0.7) + (tb.conf * 50.0)
             brand_candidates.append((score, tb))
     brand_candidates.sort(key=lambda p: p[0], reverse=True)
     brand = [tb for _, tb in brand_candidates[:15]]
 
     return ExtractedFields(
-        abv_candidates=abv,
-        net_contents_candidates=net,
         warning_candidates=warn,
         brand_candidates=brand,
         all_text=all_text,
+        paragraphs=paragraph_boxes(all_text),
     )
 
 def best_brand_match(expected: str, candidates: List[TextBox]) -> Tuple[TextBox | None, float, str]:
@@ -0,0 +1,90 @@
+"""Cheap language detection for routing OCR to the right Tesseract packs.
+
+Detection runs on text we already have (the English OCR pass, or a PDF text
+layer), so English-only labels pay no extra OCR. Words are ASCII-folded
+before matching because an English-only pass drops accents ("contenido",
+"vin", "imbottigliato" survive; "é" does not).
+"""
+
+from __future__ import annotations
+
+import functools
+import re
+import unicodedata
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+from .models import TextBox
+
+# Common function words plus label vocabulary. Keep entries distinctive: a
+# word that is also common English would make English labels look bilingual.
+STOPWORDS: Dict[str, frozenset] = {
+    "eng": frozenset("the of and to by with contains wine red white produced bottled product government warning alcoholic beverages women should not drink during pregnancy".split()),
+    "spa": frozenset("el la los las del y con por para vino tinto blanco contenido neto embotellado producto hecho una es que advertencia bebidas alcoholicas mujeres embarazo".split()),
+    "fra": frozenset("le la les du des et au avec par vin rouge blanc contient produit mis en bouteille une est avertissement boissons alcoolisees femmes enceintes grossesse".split()),
+    "ita": frozenset("il lo di della del e con per vino rosso bianco contiene prodotto imbottigliato da una che alla avvertenza bevande alcoliche donne gravidanza".split()),
+}
+
+# A region is routed to a non-English pack only with at least this many
+# distinct hits and more hits than English.
+MIN_HITS = 2
+# Shorter words ("e", "la", "di") are as likely to be OCR noise as language.
+MIN_WORD_LEN = 3
+
+_WORD_RE = re.compile(r"[a-z]+")
+
+
+def _distinctive(vocabs: Dict[str, frozenset]) -> Dict[str, frozenset]:
+    # Drop short words and words listed for more than one language ("del", "con", "vino").
+    seen: Dict[str, int] = {}
+    for vocab in vocabs.values():
+        for w in vocab:
+            seen[w] = seen.get(w, 0) + 1
+    return {lang: frozenset(w for w in vocab if len(w) >= MIN_WORD_LEN and seen[w] == 1) for lang, vocab in vocabs.items()}
+
+
+_VOCAB = _distinctive(STOPWORDS)
+
+
+def _fold(text: str) -> List[str]:
+    t = unicodedata.normalize("NFKD", text.lower())
+    t = "".join(c for c in t if not unicodedata.combining(c))
+    return _WORD_RE.findall(t)
+
+
+def detect_language(text: str) -> Tuple[str, Dict[str, int]]:
+    """Return (best language code, hit counts per language) for a piece of text."""
+    words = set(_fold(text))
+    hits = {lang: len(words & vocab) for lang, vocab in _VOCAB.items()}
+    best = max((l for l in hits if l != "eng"), key=lambda l: hits[l])
+    if hits[best] >= MIN_HITS and hits[best] > hits["eng"]:
+        return best, hits
+    return "eng", hits
+
+
+def detect_regions(paragraphs: Sequence[TextBox]) -> List[Tuple[TextBox, str]]:
+    """Language per reading-order paragraph (bilingual labels mix packs by region)."""
+    return [(p, detect_language(p.text)[0]) for p in paragraphs]
+
+
+def label_languages(paragraphs: Sequence[TextBox]) -> List[str]:
+    """Languages present on a label, ordered by how much text each covers."""
+    chars: Dict[str, int] = {}
+    for para, lang in detect_regions(paragraphs):
+        chars[lang] = chars.get(lang, 0) + len(para.text)
+    return sorted(chars, key=lambda l: chars[l], reverse=True)
+
+
+@functools.lru_cache(maxsize=1)
+def installed_languages() -> frozenset:
+    """Tesseract language packs available on this host (cached)."""
+    try:
+        import pytesseract
+        return frozenset(pytesseract.get_languages(config=""))
+    except Exception:
+        return frozenset()
+
+
+def routable(langs: Iterable[str], candidates: Iterable[str]) -> List[str]:
+    """Filter detected languages to configured candidates that are installed."""
+    allowed = set(candidates) & installed_languages()
+    return [l for l in langs if l in allowed]
@@ -0,0 +1,188 @@
+"""Geometric layout stage: word boxes -> lines -> paragraphs in reading order.
+
+Tesseract's (block, par, line) keys split lines across blocks on multi-column
+labels, so lines are rebuilt from geometry instead:
+
+1. Rows: words sorted by vertical center are swept once; each word joins an
+   active row whose conf-weighted center is within half a text height.
+   Rows are kept in a heap by their bottom edge and retired as soon as they
+   end above the current word, so the active set only holds rows the word
+   could still join and the pass is O(n log n) (the sort and heap).
+2. Lines: each row is sorted by x and split at gaps wider than
+   LINE_GAP_FACTOR x row height, which separates side-by-side columns.
+3. Paragraphs: lines are swept top to bottom and joined to an open paragraph
+   that overlaps horizontally and sits within PARA_GAP_FACTOR line heights.
+4. Reading order: paragraphs that overlap vertically form a band and are read
+   left to right; bands are read top to bottom.
+"""
+
+from __future__ import annotations
+
+import heapq
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from .models import TextBox
+
+LINE_GAP_FACTOR = 2.0
+PARA_GAP_FACTOR = 1.2
+# Floor for conf weights so zero-confidence words still contribute a little.
+MIN_WEIGHT = 0.05
+
+Line = Tuple[str, float, List[int]]  # (text, conf, [x, y, w, h])
+
+
+def band_row(fraction: float, image_h: int) -> int:
+    """First pixel row below a band ending at `fraction` of the image height.
+
+    A line belongs to the band when its top is above this row. Brand
+    candidates (extract.py) and progressive OCR bands (ocr.py) both use it, so
+    they agree on every boundary line.
+    """
+    return int(fraction * image_h)
+
+
+def words_from_tesseract(data: Dict[str, list], y_offset: int = 0, x_offset: int = 0) -> Tuple[np.ndarray, np.ndarray, List[str]]:
+    """Convert pytesseract DICT output to (boxes[n, 4], conf[n], texts) for non-empty words."""
+    texts = [(t or "").strip() for t in data["text"]]
+    keep = [i for i, t in enumerate(texts) if t]
+    if not keep:
+        return np.zeros((0, 4), dtype=np.int64), np.zeros(0, dtype=np.float64), []
+    idx = np.asarray(keep)
+    boxes = np.stack([
+        np.asarray(data["left"], dtype=np.int64)[idx] + x_offset,
+        np.asarray(data["top"], dtype=np.int64)[idx] + y_offset,
+        np.asarray(data["width"], dtype=np.int64)[idx],
+        np.asarray(data["height"], dtype=np.int64)[idx],
+    ], axis=1)
+    conf = np.clip(np.asarray([float(c) for c in data["conf"]], dtype=np.float64)[idx], 0.0, 100.0) / 100.0
+    return boxes, conf, [texts[i] for i in keep]
+
+
+def _union(boxes: np.ndarray) -> List[int]:
+    x0, y0 = boxes[:, 0].min(), boxes[:, 1].min()
+    x1, y1 = (boxes[:, 0] + boxes[:, 2]).max(), (boxes[:, 1] + boxes[:, 3]).max()
+    return [int(x0), int(y0), int(x1 - x0), int(y1 - y0)]
+
+
+def group_lines(boxes: np.ndarray, conf: np.ndarray, texts: Sequence[str]) -> List[Line]:
+    """Rebuild text lines from word boxes. Returns unsorted (text, conf, bbox) tuples."""
+    n = len(texts)
+    if n == 0:
+        return []
+    heights = np.maximum(boxes[:, 3], 1).astype(np.float64)
+    cy = boxes[:, 1] + heights / 2.0
+    weights = np.maximum(conf, MIN_WEIGHT)
+
+    # rows: [sum_w, sum_w_cy, sum_w_h, word indices]; geometry is conf-weighted
+    rows: List[list] = []
+    active: Dict[int, int] = {}  # row -> version of its current heap entry
+    bottoms: List[Tuple[float, int, int]] = []  # (row bottom, row, version); older versions are stale
+
+    def row_bottom(r: int) -> float:
+        sw, swc, swh, _ = rows[r]
+        return (swc + swh / 2.0) / sw
+
+    for i in np.argsort(cy, kind="stable"):
+        # retire rows that end above this word; they can receive no more words
+        while bottoms and bottoms[0][0] < cy[i] - heights[i]:
+            _, r, version = heapq.heappop(bottoms)
+            if active.get(r) == version:
+                del active[r]
+        best, best_d = None, None
+        for r in active:
+            sw, swc, swh, _ = rows[r]
+            row_cy, row_h = swc / sw, swh / sw
+            d = abs(cy[i] - row_cy)
+            if d <= 0.5 * max(row_h, heights[i]) and (best_d is None or d < best_d):
+                best, best_d = r, d
+        if best is None:
+            rows.append([0.0, 0.0, 0.0, []])
+            best = len(rows) - 1
+            active[best] = -1
+        row = rows[best]
+        row[0] += weights[i]
+        row[1] += weights[i] * cy[i]
+        row[2] += weights[i] * heights[i]
+        row[3].append(i)
+        # the row's bottom moved: re-key it (its previous heap entry goes stale)
+        active[best] += 1
+        heapq.heappush(bottoms, (row_bottom(best), best, active[best]))
+
+    lines: List[Line] = []
+    for sw, _, swh, members in rows:
+        row_h = swh / sw
+        idx = np.asarray(members)
+        idx = idx[np.argsort(boxes[idx, 0], kind="stable")]
+        right = boxes[idx, 0] + boxes[idx, 2]
+        gaps = boxes[idx[1:], 0] - right[:-1]
+        splits = np.nonzero(gaps > LINE_GAP_FACTOR * row_h)[0] + 1
+        for seg in np.split(idx, splits):
+            text = " ".join(texts[j] for j in seg)
+            lines.append((text, float(conf[seg].mean()), _union(boxes[seg])))
+    return lines
+
+
+def _overlap(a0: float, a1: float, b0: float, b1: float) -> float:
+    return max(0.0, min(a1, b1) - max(a0, b0))
+
+
+def reading_order_paragraphs(lines: Sequence[TextBox]) -> List[List[TextBox]]:
+    """Group line boxes into paragraphs and return them in reading order."""
+    if not lines:
+        return []
+    ordered = sorted(lines, key=lambda tb: (tb.bbox[1], tb.bbox[0]))
+
+    # paragraphs: [x0, x1, bottom, last_line_h, lines]
+    paras: List[list] = []
+    open_paras: List[int] = []
+    for tb in ordered:
+        x, y, w, h = tb.bbox
+        h = max(h, 1)
+        open_paras = [p for p in open_paras if y - paras[p][2] <= PARA_GAP_FACTOR * max(paras[p][3], h)]
+        target = None
+        for p in open_paras:
+            px0, px1 = paras[p][0], paras[p][1]
+            if _overlap(x, x + w, px0, px1) >= 0.5 * min(w, px1 - px0) and y >= paras[p][2] - 0.5 * h:
+                target = p
+                break
+        if target is None:
+            paras.append([x, x + w, y + h, h, [tb]])
+            open_paras.append(len(paras) - 1)
+        else:
+            para = paras[target]
+            para[0], para[1] = min(para[0], x), max(para[1], x + w)
+            para[2], para[3] = max(para[2], y + h), h
+            para[4].append(tb)
+
+    # bands of vertically overlapping paragraphs, each read left to right
+    spans = sorted(
+        ((min(t.bbox[1] for t in p[4]), p[2], p[0], p[4]) for p in paras),
+        key=lambda s: (s[0], s[2]),
+    )
+    out: List[List[TextBox]] = []
+    band: List[tuple] = []
+    band_bottom = None
+    for span in spans:
+        if band and span[0] >= band_bottom:
+            out.extend(s[3] for s in sorted(band, key=lambda s: s[2]))
+            band = []
+        band_bottom = span[1] if not band else max(band_bottom, span[1])
+        band.append(span)
+    out.extend(s[3] for s in sorted(band, key=lambda s: s[2]))
+    return out
+
+
+def paragraph_boxes(lines: Sequence[TextBox]) -> List[TextBox]:
+    """Reading-order paragraphs as TextBoxes (ids p1..pN, text joined with spaces)."""
+    out: List[TextBox] = []
+    for idx, para in enumerate(reading_order_paragraphs(lines), start=1):
+        arr = np.asarray([tb.bbox for tb in para], dtype=np.int64)
+        out.append(TextBox(
+            id=f"p{idx}",
+            text=" ".join(tb.text for tb in para),
+            conf=float(sum(tb.conf for tb in para) / len(para)),
+            bbox=_union(arr),
+        ))
+    return out
@@ -2,19 +2,31 @@ import io
 import json
 import time
 import zipfile
-from fastapi import FastAPI, UploadFile, File, Form
+import os
+import threading
+from fastapi import FastAPI, UploadFile, File, Form, Header, HTTPException
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from PIL import Image
 
 from .models import ApplicationFields, VerificationResult
-from .ocr import ocr_boxes
+from .pdf import label_boxes
+from .ocr import UnreadableLabelError, upload_capabilities
 from .extract import extract_fields
 from .compare import compare
+from .verify import verify_label
+from .batch_store import BatchStore
+from .brand_index import get_brand_index
+from .sharding import error_result, get_broker, run_sharded
+from .profiling import load_profile
+from .rules import get_rules
 import base64
 from zipfile import ZipFile
 from collections import defaultdict
 
 
+BATCH_PAGE_SIZE = int(os.getenv("BATCH_PAGE_SIZE", "100"))
+
 app = FastAPI(title="Alcohol Label Verifier", version="0.2.0")
 
 app.add_middleware(
@@ -25,39 +37,34 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-@app.get("/health")
-def health():
-    return {"ok": True}
-
-def _image_size_from_bytes(image_bytes: bytes) -> tuple[int, int]:
-    img = Image.open(io.BytesIO(image_bytes))
-    return img.size
+@app.on_event("startup")
+def _warm_brand_index():
+    # Load the registered-brand index in the background so startup is not blocked.
+    threading.Thread(target=get_brand_index, daemon=True).start()
 
+@app.on_event("startup")
+def _compile_rules():
+    # Compile field rules (with THRESHOLDS_PATH overrides) up front so a bad
+    # RULES_PATH or THRESHOLDS_PATH fails at startup, not on the first label.
+    get_rules()
 
-def _run_verification(image_bytes: bytes, app_fields: ApplicationFields, debug: bool = False) -> VerificationResult:
-    t0 = time.time()
-    w, h = _image_size_from_bytes(image_bytes)
+def _header_flag(value: str | None) -> bool:
+    return (value or "").strip().lower() in ("1", "true", "yes", "on")
 
-    boxes, t_ocr = ocr_boxes(image_bytes)
-    t1 = time.time()
-
-    ext = extract_fields(boxes, image_w=w, image_h=h)
-    items = compare(app_fields, ext)
-
-    overall = "PASS" if all(i.status == "PASS" for i in items) else "NEEDS_REVIEW"
+@app.get("/health")
+def health():
+    return {"ok": True}
 
-    timings = {
-        **t_ocr,
-        "extract_compare_ms": int((time.time() - t1) * 1000),
-        "total_ms": int((time.time() - t0) * 1000),
-    }
+@app.get("/api/capabilities")
+def capabilities():
+    # Lets the UI downscale and compress labels in the browser before upload.
+    return upload_capabilities()
 
-    return VerificationResult(
-        overall_status=overall,
-        items=items,
-        timings_ms=timings,
-        debug={"num_boxes": len(boxes)} if debug else None
-    )
+def _run_verification(image_bytes: bytes, app_fields: ApplicationFields, debug: bool = False, progressive: bool = False, profile: bool = False) -> VerificationResult:
+    try:
+        return verify_label(image_bytes, app_fields, progressive=progressive, profile=profile, debug=debug)
+    except UnreadableLabelError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 @app.post("/api/verify", response_model=VerificationResult)
 async def verify(
@@ -66,9 +73,22 @@ async def verify(
     abv: str | None = Form(None),
     net_contents: str | None = Form(None),
     require_gov_warning: bool = Form(True),
+    class_type: str | None = Form(None),
+    producer: str | None = Form(None),
+    country_of_origin: str | None = Form(None),
+    contains_sulfites: bool | None = Form(None),
     debug: bool = Form(False),
+    progressive: bool = Form(False),
+    profile: bool = Form(False),
+    x_profile: str | None = Header(None),
 ):
-    t0 = time.time()
+    """Verify a label image against application fields.
+
+    Set progressive=true to OCR the label band by band and stop as soon as the
+    overall status is decided (skipped bands are listed in the response).
+    Set profile=true (or header X-Profile: 1) to capture a profile; its id is
+    returned as profile_id.
+    """
     image_bytes = await file.read()
 
     app_fields = ApplicationFields(
@@ -76,36 +96,22 @@ async def verify(
         abv=abv,
         net_contents=net_contents,
         require_gov_warning=require_gov_warning,
+        class_type=class_type,
+        producer=producer,
+        country_of_origin=country_of_origin,
+        contains_sulfites=contains_sulfites,
     )
 
-    w, h = _image_size_from_bytes(image_bytes)
-
-    boxes, t_ocr = ocr_boxes(image_bytes)
-    t1 = time.time()
-
-    ext = extract_fields(boxes, image_w=w, image_h=h)
-    items = compare(app_fields, ext)
-
-    overall = "PASS" if all(i.status == "PASS" for i in items) else "NEEDS_REVIEW"
-
-    timings = {
-        **t_ocr,
-        "extract_compare_ms": int((time.time() - t1) * 1000),
-        "total_ms": int((time.time() - t0) * 1000),
-    }
-
-    return VerificationResult(
-        overall_status=overall,
-        items=items,
-        timings_ms=timings,
-        debug={"num_boxes": len(boxes)} if debug else None
-    )
+    return _run_verification(image_bytes=image_bytes, app_fields=app_fields, debug=debug, progressive=progressive, profile=profile or _header_flag(x_profile))
 
 @app.post("/api/verify-with-application-json", response_model=VerificationResult)
 async def verify_with_application_json(
     file: UploadFile = File(...),
     application_json: UploadFile = File(...),
     debug: bool = Form(False),
+    progressive: bool = Form(False),
+    profile: bool = Form(False),
+    x_profile: str | None = Header(None),
 ):
     """Verify a label image against a COLA application JSON file.
 
@@ -123,14 +129,9 @@ async def verify_with_application_json(
         from fastapi import HTTPException
         raise HTTPException(status_code=400, detail=f"Invalid application JSON: {e}")
 
-    app_fields = ApplicationFields(
-        brand_name=str(app_data.get("brand_name", "")).strip(),
-        abv=app_data.get("abv"),
-        net_contents=app_data.get("net_contents"),
-        require_gov_warning=bool(app_data.get("government_warning_required", True)),
-    )
+    app_fields = ApplicationFields.from_application_json(app_data)
 
-    return _run_verification(image_bytes=image_bytes, app_fields=app_fields, debug=debug)
+    return _run_verification(image_bytes=image_bytes, app_fields=app_fields, debug=debug, progressive=progressive, profile=profile or _header_flag(x_profile))
 
 
 @app.post("/api/verify-batch")
@@ -146,7 +147,7 @@ async def verify_batch(
     results = []
 
     for name in z.namelist():
-        if name.lower().endswith((".png", ".jpg", ".jpeg")):
+        if name.lower().endswith((".png", ".jpg", ".jpeg", ".webp", ".pdf")):
             image_bytes = z.read(name)
             app_fields = ApplicationFields(
                 brand_name=brand_name,
@@ -154,10 +155,9 @@ async def verify_batch(
                 net_contents=net_contents,
                 require_gov_warning=require_gov_warning,
             )
-            w, h = _image_size_from_bytes(image_bytes)
-            boxes, _ = ocr_boxes(image_bytes)
+            boxes, _, (w, h) = label_boxes(image_bytes)
             ext = extract_fields(boxes, image_w=w, image_h=h)
-            items = compare(app_fields, ext)
+            items = compare(app_fields, ext, brand_index=get_brand_index())
             overall = "PASS" if all(i.status == "PASS" for i in items) else "NEEDS_REVIEW"
             import base64
             from PIL import Image
@@ -178,28 +178,12 @@ async def verify_batch(
     return {"count": len(results), "results": results}
 
 
-from zipfile import ZipFile
-import io
-import json as _json
-from collections import defaultdict
+def _iter_zip_pairs(zf: ZipFile):
+    """Yield (folder, label_key, label_bytes, app_data) for each label/application pair.
 
-@app.post("/api/verify-batch-pairs")
-async def verify_batch_pairs(
-    zip_file: UploadFile = File(...),
-):
-    """Verify a ZIP containing (label image + application.json) pairs.
-
-    Expected ZIP structure examples:
-      - regular/sample_01/label.png + regular/sample_01/application.json
-      - sample_01/label.png + sample_01/application.json
-
-    Each folder must contain:
-      - label.(png|jpg|jpeg) (or any image)
-      - application.json
+    Only file names are held in memory up front; each pair's bytes are read
+    from the archive when it is yielded.
     """
-    data = await zip_file.read()
-    zf = ZipFile(io.BytesIO(data))
-
     # group files by folder
     groups = defaultdict(dict)
     for info in zf.infolist():
@@ -207,11 +191,10 @@ async def verify_batch_pairs(
             continue
         name = info.filename
         lower = name.lower()
-        if lower.endswith((".png", ".jpg", ".jpeg", ".json")):
+        if lower.endswith((".png", ".jpg", ".jpeg", ".webp", ".pdf", ".json")):
             folder = name.rsplit("/", 1)[0] if "/" in name else ""
             groups[folder][name.rsplit("/", 1)[-1].lower()] = name
 
-    results = []
     for folder, files in groups.items():
         # find application.json
         app_key = "application.json" if "application.json" in files else None
@@ -221,60 +204,150 @@ async def verify_batch_pairs(
         # find label image (prefer label.*)
         label_key = None
         for k in files.keys():
-            if k.endswith((".png", ".jpg", ".jpeg")) and ("label" in k or k.startswith("label")):
+            if k.endswith((".png", ".jpg", ".jpeg", ".webp", ".pdf")) and ("label" in k or k.startswith("label")):
                 label_key = k
                 break
         if label_key is None:
             for k in files.keys():
-                if k.endswith((".png", ".jpg", ".jpeg")):
+                if k.endswith((".png", ".jpg", ".jpeg", ".webp", ".pdf")):
                     label_key = k
                     break
         if not label_key:
             continue
 
-        label_path = files[label_key]
-        app_path = files[app_key]
-
-        label_bytes = zf.read(label_path)
-        app_bytes = zf.read(app_path)
+        label_bytes = zf.read(files[label_key])
+        app_bytes = zf.read(files[app_key])
 
         try:
             app_data = json.loads(app_bytes.decode("utf-8"))
         except Exception:
             app_data = {}
 
-        # thumbnail (base64 JPEG)
-        thumb_b64 = None
+        yield folder, label_key, label_bytes, app_data
+
+
+def _thumbnail_b64(label_bytes: bytes) -> str | None:
+    # thumbnail (base64 JPEG)
+    try:
+        im = Image.open(io.BytesIO(label_bytes)).convert("RGB")
+        im.thumbnail((220, 220))
+        buf = io.BytesIO()
+        im.save(buf, format="JPEG", quality=70)
+        return base64.b64encode(buf.getvalue()).decode("utf-8")
+    except Exception:
+        return None
+
+
+@app.post("/api/verify-batch-pairs")
+def verify_batch_pairs(
+    zip_file: UploadFile = File(...),
+    progressive: bool = Form(False),
+    page_size: int = Form(BATCH_PAGE_SIZE),
+):
+    """Verify a ZIP containing (label image + application.json) pairs.
+
+    Expected ZIP structure examples:
+      - regular/sample_01/label.png + regular/sample_01/application.json
+      - sample_01/label.png + sample_01/application.json
+
+    Each folder must contain:
+      - label.(png|jpg|jpeg|pdf) (or any image)
+      - application.json
+
+    Results are written to an on-disk batch store as they are produced. The
+    response carries the batch_id and the first page of results; use
+    /api/batches/{batch_id}/results to page/filter and
+    /api/batches/{batch_id}/export.csv to export.
+    """
+    from app.verify import verify_application_pair  # local import to avoid circulars
+
+    # A plain def, so FastAPI runs this in its threadpool: OCR and waiting on
+    # shard workers block a worker thread, not the event loop.
+    # Read the archive from the spooled upload file instead of copying it into memory.
+    zf = ZipFile(zip_file.file)
+    pairs = _iter_zip_pairs(zf)
+
+    def verify_pair(label_bytes, app_data):
+        # One unreadable label is recorded as an error, as shard workers do.
         try:
-            im = Image.open(io.BytesIO(label_bytes)).convert("RGB")
-            im.thumbnail((220, 220))
-            buf = io.BytesIO()
-            im.save(buf, format="JPEG", quality=70)
-            thumb_b64 = base64.b64encode(buf.getvalue()).decode("utf-8")
-        except Exception:
-            thumb_b64 = None
+            return verify_application_pair(label_bytes, app_data, progressive=progressive)
+        except Exception as e:
+            return error_result(f"{type(e).__name__}: {e}")
+
+    # With BATCH_BROKER set, shards go to worker nodes; results come back in order.
+    broker = get_broker()
+    if broker is None:
+        verified = ((*pair, verify_pair(pair[2], pair[3])) for pair in pairs)
+    else:
+        verified = run_sharded(pairs, broker, progressive=progressive)
+
+    store = BatchStore.create()
+    try:
+        for folder, label_key, label_bytes, app_data, res in verified:
+            store.append({
+                "folder": folder or "(root)",
+                "label_filename": label_key,
+                "thumbnail_b64": _thumbnail_b64(label_bytes),
+                "application": {
+                    "brand_name": app_data.get("brand_name", ""),
+                    "abv": app_data.get("abv", ""),
+                    "net_contents": app_data.get("net_contents", ""),
+                    "government_warning_required": bool(app_data.get("government_warning_required", True)),
+                },
+                "result": res,
+            })
+    except BaseException:
+        store.close(status="failed")
+        raise
+    store.close()
+
+    page = store.page(offset=0, limit=page_size)
+    return {"batch_id": store.batch_id, "count": store.count, "results": page["results"], "next_offset": page["next_offset"]}
+
+
+def _open_batch(batch_id: str) -> BatchStore:
+    try:
+        return BatchStore.open(batch_id)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Unknown batch: {batch_id}")
 
-        from app.verify import verify_label_bytes  # local import to avoid circulars
-
-        res = verify_label_bytes(
-            label_bytes=label_bytes,
-            brand_name=app_data.get("brand_name", ""),
-            abv=app_data.get("abv", ""),
-            net_contents=app_data.get("net_contents", ""),
-            require_gov_warning=bool(app_data.get("government_warning_required", True)),
-        )
-
-        results.append({
-            "folder": folder or "(root)",
-            "label_filename": label_key,
-            "thumbnail_b64": thumb_b64,
-            "application": {
-                "brand_name": app_data.get("brand_name", ""),
-                "abv": app_data.get("abv", ""),
-                "net_contents": app_data.get("net_contents", ""),
-                "government_warning_required": bool(app_data.get("government_warning_required", True)),
-            },
-            "result": res,
-        })
 
-    return {"count": len(results), "results": results}
+@app.get("/api/batches/{batch_id}")
+def get_batch(batch_id: str):
+    return _open_batch(batch_id).meta()
+
+
+@app.get("/api/batches/{batch_id}/results")
+def get_batch_results(
+    batch_id: str,
+    offset: int = 0,
+    limit: int = BATCH_PAGE_SIZE,
+    status: str | None = None,
+    failing_field: str | None = None,
+):
+    """Page through stored batch results.
+
+    Filters:
+      - status: overall_status (PASS | NEEDS_REVIEW)
+      - failing_field: only results where this check is not PASS (e.g. abv)
+    """
+    return _open_batch(batch_id).page(offset=offset, limit=min(limit, 1000), status=status, failing_field=failing_field)
+
+
+@app.get("/api/batches/{batch_id}/export.csv")
+def export_batch_csv(batch_id: str, status: str | None = None, failing_field: str | None = None):
+    store = _open_batch(batch_id)
+    return StreamingResponse(
+        store.iter_csv(status=status, failing_field=failing_field),
+        media_type="text/csv",
+        headers={"Content-Disposition": f'attachment; filename="batch_{batch_id}.csv"'},
+    )
+
+
+@app.get("/api/profiles/{profile_id}", response_class=PlainTextResponse)
+def get_profile(profile_id: str):
+    """Return a captured profile in collapsed-stack format (flamegraph.pl / speedscope)."""
+    try:
+        return load_profile(profile_id)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Unknown profile: {profile_id}")
@@ -6,6 +6,25 @@ class ApplicationFields(BaseModel):
     abv: Optional[str] = Field(None, description="Expected ABV (e.g., '12.5%')")
     net_contents: Optional[str] = Field(None, description="Expected net contents (e.g., '750 mL')")
     require_gov_warning: bool = Field(True, description="Whether govt warning is required for this label")
+    class_type: Optional[str] = Field(None, description="Expected class/type designation (e.g., 'Red Wine')")
+    producer: Optional[str] = Field(None, description="Expected bottler/producer name")
+    country_of_origin: Optional[str] = Field(None, description="Expected country of origin (imports)")
+    contains_sulfites: Optional[bool] = Field(None, description="Whether a sulfite declaration is required")
+
+    @classmethod
+    def from_application_json(cls, app_data: Dict[str, Any]) -> "ApplicationFields":
+        """Build fields from a COLA application.json dict."""
+        return cls(
+            brand_name=str(app_data.get("brand_name", "")).strip(),
+            abv=app_data.get("abv"),
+            net_contents=app_data.get("net_contents"),
+            require_gov_warning=bool(app_data.get("government_warning_required", True)),
+            # "designation" is what the label prints ("Red Wine"); "class_type" may be just "Wine".
+            class_type=app_data.get("designation") or app_data.get("class_type"),
+            producer=app_data.get("producer"),
+            country_of_origin=app_data.get("country_of_origin"),
+            contains_sulfites=app_data.get("contains_sulfites"),
+        )
 
 class TextBox(BaseModel):
     id: str
@@ -14,11 +33,10 @@ class TextBox(BaseModel):
     bbox: List[int]  # [x, y, w, h]
 
 class ExtractedFields(BaseModel):
-    abv_candidates: List[TextBox] = []
-    net_contents_candidates: List[TextBox] = []
     warning_candidates: List[TextBox] = []
     brand_candidates: List[TextBox] = []
     all_text: List[TextBox] = []
+    paragraphs: List[TextBox] = []  # reading-order paragraphs built from all_text
 
 class CheckItem(BaseModel):
     field: str
@@ -33,4 +51,9 @@ class VerificationResult(BaseModel):
     overall_status: str  # PASS | NEEDS_REVIEW
     items: List[CheckItem]
     timings_ms: Dict[str, int] = {}
+    rule_timings_us: Dict[str, int] = {}  # scoring time per field rule (see rules.py)
+    languages: List[str] = []  # detected label languages, most text first (e.g. ["eng", "spa"])
+    ocr_stats: Dict[str, int] = {}  # OCR counters that are not times, e.g. lang_regions_reocr
+    progressive: Optional[Dict[str, Any]] = None  # regions_read / regions_skipped when early-exit mode was used
+    profile_id: Optional[str] = None  # set when the request was profiled; see /api/profiles/{id}
     debug: Optional[Dict[str, Any]] = None
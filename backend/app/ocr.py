@@ -1,15 +1,16 @@
 import os
 import io
 import time
-from typing import List, Tuple, Dict, DefaultDict
-from collections import defaultdict
+from typing import List, Tuple, Dict, Iterator, Optional
 
-from PIL import Image
+from PIL import Image, UnidentifiedImageError, features
 import pytesseract
 import cv2
 import numpy as np
 
 from .models import TextBox
+from .layout import band_row, words_from_tesseract, group_lines, paragraph_boxes
+from .lang import detect_regions, routable
 
 def _preprocess(pil_img: Image.Image, max_pixels: int) -> Image.Image:
     # Resize huge images for speed
@@ -20,16 +21,74 @@ def _preprocess(pil_img: Image.Image, max_pixels: int) -> Image.Image:
         pil_img = pil_img.resize((nw, nh))
     return pil_img
 
-def _union_bbox(bboxes):
-    xs = [b[0] for b in bboxes]
-    ys = [b[1] for b in bboxes]
-    xe = [b[0] + b[2] for b in bboxes]
-    ye = [b[1] + b[3] for b in bboxes]
-    x0, y0, x1, y1 = min(xs), min(ys), max(xe), max(ye)
-    return [int(x0), int(y0), int(x1 - x0), int(y1 - y0)]
+class UnreadableLabelError(ValueError):
+    """The uploaded label is not a decodable image or PDF."""
 
-def ocr_boxes(image_bytes: bytes) -> Tuple[List[TextBox], Dict[str, int]]:
-    """Return LINE-level OCR boxes.
+def open_label_image(image_bytes: bytes) -> Image.Image:
+    try:
+        return Image.open(io.BytesIO(image_bytes))
+    except UnidentifiedImageError as e:
+        raise UnreadableLabelError(f"Label is not a readable image or PDF: {e}") from e
+
+def max_image_pixels() -> int:
+    return int(os.getenv("MAX_IMAGE_PIXELS", "6000000"))
+
+def upload_capabilities() -> Dict[str, object]:
+    """What clients may pre-process before upload (served at /api/capabilities).
+
+    Anything past max_image_pixels is discarded here, and OCR only needs a
+    grayscale or binarized image, so clients can downscale and send one of the
+    compact formats instead of the original photo.
+    """
+    formats = ["png-1bit", "png-gray"]
+    if features.check("webp"):
+        formats.append("webp-gray")
+    return {"max_image_pixels": max_image_pixels(), "compact_formats": formats, "binarization": "otsu"}
+
+def binarize_label(image_bytes: bytes, max_pixels: int | None = None) -> np.ndarray:
+    """Decode, downscale to the pixel budget and Otsu-binarize a label image.
+
+    Compact uploads skip work: grayscale ("L") images skip colour conversion,
+    and 1-bit images are already binarized.
+    """
+    if max_pixels is None:
+        max_pixels = max_image_pixels()
+    pil_img = open_label_image(image_bytes)
+    if pil_img.mode not in ("1", "L"):
+        pil_img = pil_img.convert("RGB")
+    pil_img = _preprocess(pil_img, max_pixels)
+
+    if pil_img.mode == "1":
+        return np.array(pil_img.convert("L"))
+    if pil_img.mode == "L":
+        gray = np.array(pil_img)
+    else:
+        img = cv2.cvtColor(np.array(pil_img), cv2.COLOR_RGB2BGR)
+        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+    return cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)[1]
+
+def _ocr_lines(gray: np.ndarray, lang: str, y_offset: int = 0, x_offset: int = 0) -> List[Tuple[str, float, List[int]]]:
+    """OCR a binarized image and return (text, conf, bbox) per line, unsorted.
+
+    y_offset/x_offset shift bboxes back into full-image coordinates when OCR runs on a crop.
+    """
+    data = pytesseract.image_to_data(gray, lang=lang, output_type=pytesseract.Output.DICT)
+    boxes, conf, texts = words_from_tesseract(data, y_offset=y_offset, x_offset=x_offset)
+    return group_lines(boxes, conf, texts)
+
+def _to_text_boxes(lines: List[Tuple[str, float, List[int]]]) -> List[TextBox]:
+    # Sort top-to-bottom, then left-to-right, and assign stable line ids.
+    ordered = sorted(lines, key=lambda t: (t[2][1], t[2][0]))
+    return [
+        TextBox(id=f"l{idx}", text=text, conf=float(conf), bbox=bbox)
+        for idx, (text, conf, bbox) in enumerate(ordered, start=1)
+    ]
+
+def ocr_boxes(image_bytes: bytes, stats: Optional[Dict[str, int]] = None) -> Tuple[List[TextBox], Dict[str, int]]:
+    """Return LINE-level OCR boxes and stage timings.
+
+    stats, if given, receives counters that are not times (e.g.
+    lang_regions_reocr, the paragraphs re-read with another language pack).
 
     Why line-level?
     - Tesseract often returns single words (e.g. brand becomes just 'THROW')
@@ -37,54 +96,91 @@ def ocr_boxes(image_bytes: bytes) -> Tuple[List[TextBox], Dict[str, int]]:
     - 'GOVERNMENT WARNING' may come back as separate words
 
     Grouping into lines makes regex extraction and matching behave like a human reviewer.
+    Lines are rebuilt geometrically (see layout.py) rather than from Tesseract's
+    block/line keys, so lines split across blocks are merged again.
     """
     t0 = time.time()
-    max_pixels = int(os.getenv("MAX_IMAGE_PIXELS", "6000000"))
     lang = os.getenv("OCR_LANG", "eng")
 
-    pil_img = Image.open(io.BytesIO(image_bytes)).convert("RGB")
-    pil_img = _preprocess(pil_img, max_pixels)
+    gray = binarize_label(image_bytes)
+    lines = _ocr_lines(gray, lang)
+    timings = {"ocr_ms": int((time.time() - t0) * 1000)}
 
-    img = cv2.cvtColor(np.array(pil_img), cv2.COLOR_RGB2BGR)
-    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-    gray = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)[1]
+    candidates = [l for l in os.getenv("OCR_LANG_ROUTING", "").split(",") if l.strip()]
+    if candidates:
+        t1 = time.time()
+        lines, rerun = _route_languages(gray, lines, lang, [l.strip() for l in candidates])
+        timings["lang_route_ms"] = int((time.time() - t1) * 1000)
+        if stats is not None:
+            stats["lang_regions_reocr"] = rerun
 
-    data = pytesseract.image_to_data(gray, lang=lang, output_type=pytesseract.Output.DICT)
+    return _to_text_boxes(lines), timings
 
-    # Group words into lines using Tesseract's block/par/line indices.
-    groups: DefaultDict[tuple, list] = defaultdict(list)
-    n = len(data["text"])
-    for i in range(n):
-        txt = (data["text"][i] or "").strip()
-        if not txt:
-            continue
-        conf_raw = data["conf"][i]
-        conf = float(conf_raw) if conf_raw != "-1" else 0.0
-        x, y, w, h = int(data["left"][i]), int(data["top"][i]), int(data["width"][i]), int(data["height"][i])
-        key = (
-            int(data.get("page_num", [1]*n)[i]),
-            int(data.get("block_num", [0]*n)[i]),
-            int(data.get("par_num", [0]*n)[i]),
-            int(data.get("line_num", [0]*n)[i]),
-        )
-        groups[key].append((x, y, w, h, max(0.0, conf) / 100.0, txt))
-
-    # Build line boxes sorted top-to-bottom, then left-to-right
-    line_items = []
-    for key, words in groups.items():
-        words.sort(key=lambda t: t[0])  # by x
-        text = " ".join(w[-1] for w in words)
-        bboxes = [(w[0], w[1], w[2], w[3]) for w in words]
-        bbox = _union_bbox(bboxes)
-        conf = sum(w[4] for w in words) / max(1, len(words))
-        # approximate y for sorting
-        line_items.append((bbox[1], bbox[0], text, conf, bbox))
-
-    line_items.sort(key=lambda t: (t[0], t[1]))
-
-    boxes: List[TextBox] = []
-    for idx, (_, __, text, conf, bbox) in enumerate(line_items, start=1):
-        boxes.append(TextBox(id=f"l{idx}", text=text, conf=float(conf), bbox=bbox))
+def _route_languages(gray: np.ndarray, lines, base_lang: str, candidates: List[str]):
+    """Re-OCR paragraphs detected as another language with base_lang+<pack>.
 
-    timings = {"ocr_ms": int((time.time() - t0) * 1000)}
-    return boxes, timings
+    Detection uses the text from the base pass, so labels with no foreign
+    paragraphs cost one text scan and no extra Tesseract calls. Only the
+    foreign regions are re-read, each with just the one extra pack it needs.
+    Returns (lines, number of regions re-OCR'd).
+    """
+    paragraphs = paragraph_boxes(_to_text_boxes(lines))
+    foreign = [(p, l) for p, l in detect_regions(paragraphs) if l != "eng" and routable([l], candidates)]
+    if not foreign:
+        return lines, 0
+
+    img_h, img_w = gray.shape[:2]
+    for para, pack in foreign:
+        x, y, w, h = para.bbox
+        m = max(2, int(h * 0.05))
+        x0, y0, x1, y1 = max(0, x - m), max(0, y - m), min(img_w, x + w + m), min(img_h, y + h + m)
+
+        def inside(bbox):
+            cx, cy = bbox[0] + bbox[2] / 2.0, bbox[1] + bbox[3] / 2.0
+            return x0 <= cx < x1 and y0 <= cy < y1
+
+        # Lines centred in the crop are replaced by the re-read; fragments of
+        # neighbouring lines clipped by the crop margin keep their original read.
+        lines = [ln for ln in lines if not inside(ln[2])]
+        lines += [ln for ln in _ocr_lines(gray[y0:y1, x0:x1], f"{base_lang}+{pack}", y_offset=y0, x_offset=x0) if inside(ln[2])]
+    return lines, len(foreign)
+
+def ocr_regions(gray: np.ndarray, regions: List[Tuple[str, float, float]]) -> Iterator[Tuple[str, List[TextBox], int, bool]]:
+    """OCR a binarized label band by band, yielding (region_name, boxes_so_far, ocr_ms, complete).
+
+    regions are (name, y_start, y_end) as fractions of image height, top to bottom.
+    A line belongs to the band containing its top edge, with boundaries
+    rounded by layout.band_row as extract_fields does for brand candidates. Each band is cropped with a
+    small margin; a line cut off by the bottom of the crop is carried over and
+    read whole with the next band. complete is True when every line whose top
+    lies above the band's end has been returned.
+    The generator can be abandoned early, which skips OCR for remaining bands.
+    """
+    lang = os.getenv("OCR_LANG", "eng")
+
+    img_h = gray.shape[0]
+    margin = max(1, int(img_h * 0.03))
+
+    lines: List[Tuple[str, float, List[int]]] = []
+    carried_top = None  # top of the highest line cut off by the previous crop
+    prev_bottom = 0
+    for i, (name, start, end) in enumerate(regions):
+        t0 = time.time()
+        last = i == len(regions) - 1
+        y0, y1 = band_row(start, img_h), band_row(end, img_h)
+        accept_from = y0 if carried_top is None else min(y0, carried_top)
+        crop_top = max(0, accept_from - margin)
+        crop_bottom = img_h if last else min(img_h, y1 + margin)
+        carried_top = None
+        for text, conf, bbox in _ocr_lines(gray[crop_top:crop_bottom], lang, y_offset=crop_top):
+            top, bottom = bbox[1], bbox[1] + bbox[3]
+            if not (accept_from <= top < y1 or (last and top >= y1)):
+                continue
+            if top < y0 and bottom < prev_bottom - 1:
+                continue  # read whole by the previous band already
+            if bottom >= crop_bottom - 1 and crop_bottom < img_h:
+                carried_top = top if carried_top is None else min(carried_top, top)
+                continue
+            lines.append((text, conf, bbox))
+        prev_bottom = crop_bottom
+        yield name, _to_text_boxes(lines), int((time.time() - t0) * 1000), carried_top is None
@@ -0,0 +1,148 @@
+"""PDF label ingestion via poppler-utils (installed in the backend image).
+
+Two paths:
+- Text layer: `pdftotext -bbox-layout` gives line/word positions directly, so
+  artwork PDFs become TextBox lines without running Tesseract.
+- No usable text layer: rasterize only the first page with `pdftoppm` at
+  PDF_RASTER_DPI and OCR it like any other image.
+"""
+
+from __future__ import annotations
+
+import io
+import os
+import subprocess
+import tempfile
+import time
+import xml.etree.ElementTree as ET
+from typing import Dict, List, Optional, Tuple
+
+from PIL import Image
+
+from .models import TextBox
+from .ocr import UnreadableLabelError, ocr_boxes, open_label_image
+
+PDF_MAGIC = b"%PDF"
+
+
+def is_pdf(data: bytes) -> bool:
+    return data[:1024].lstrip().startswith(PDF_MAGIC)
+
+
+def _dpi() -> int:
+    return int(os.getenv("PDF_RASTER_DPI", "300"))
+
+
+def _local(tag: str) -> str:
+    # pdftotext emits XHTML; strip the namespace from tags.
+    return tag.rsplit("}", 1)[-1]
+
+
+def parse_bbox_layout(xhtml: str, scale: float = 1.0) -> Tuple[List[TextBox], Tuple[int, int]]:
+    """Parse the first page of `pdftotext -bbox-layout` output into line boxes.
+
+    Coordinates are PDF points multiplied by `scale` (dpi / 72), so text-layer
+    boxes live in the same pixel space as a rasterized page.
+    """
+    root = ET.fromstring(xhtml)
+    page = next((el for el in root.iter() if _local(el.tag) == "page"), None)
+    if page is None:
+        return [], (0, 0)
+    size = (int(float(page.get("width", 0)) * scale), int(float(page.get("height", 0)) * scale))
+
+    lines = []
+    for line in (el for el in page.iter() if _local(el.tag) == "line"):
+        words = [(w.text or "").strip() for w in line if _local(w.tag) == "word"]
+        text = " ".join(w for w in words if w)
+        if not text:
+            continue
+        x0, y0 = float(line.get("xMin", 0)) * scale, float(line.get("yMin", 0)) * scale
+        x1, y1 = float(line.get("xMax", 0)) * scale, float(line.get("yMax", 0)) * scale
+        lines.append((text, [int(x0), int(y0), int(x1 - x0), int(y1 - y0)]))
+
+    lines.sort(key=lambda t: (t[1][1], t[1][0]))
+    boxes = [TextBox(id=f"l{idx}", text=text, conf=1.0, bbox=bbox) for idx, (text, bbox) in enumerate(lines, start=1)]
+    return boxes, size
+
+
+def _has_usable_text(boxes: List[TextBox]) -> bool:
+    min_words = int(os.getenv("PDF_MIN_TEXT_WORDS", "3"))
+    words = sum(1 for b in boxes for w in b.text.split() if any(c.isalnum() for c in w))
+    return words >= min_words
+
+
+def pdf_text_boxes(pdf_bytes: bytes) -> Optional[Tuple[List[TextBox], Tuple[int, int]]]:
+    """Return (boxes, (w, h)) from the PDF text layer, or None if it is unusable.
+
+    A pdftotext failure (timeout, missing binary) also returns None, so the
+    caller falls back to rasterizing, which reports the error.
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        src = os.path.join(tmp, "label.pdf")
+        with open(src, "wb") as f:
+            f.write(pdf_bytes)
+        try:
+            proc = subprocess.run(
+                ["pdftotext", "-bbox-layout", "-f", "1", "-l", "1", src, "-"],
+                capture_output=True, timeout=30,
+            )
+        except (subprocess.TimeoutExpired, OSError):
+            return None
+    if proc.returncode != 0 or not proc.stdout:
+        return None
+    try:
+        boxes, size = parse_bbox_layout(proc.stdout.decode("utf-8", errors="replace"), scale=_dpi() / 72.0)
+    except ET.ParseError:
+        return None
+    return (boxes, size) if _has_usable_text(boxes) else None
+
+
+def rasterize_pdf(pdf_bytes: bytes, page: int = 1) -> bytes:
+    """Render a single PDF page to PNG bytes at PDF_RASTER_DPI.
+
+    Raises UnreadableLabelError when poppler cannot render the page.
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        src = os.path.join(tmp, "label.pdf")
+        with open(src, "wb") as f:
+            f.write(pdf_bytes)
+        out_root = os.path.join(tmp, "page")
+        try:
+            subprocess.run(
+                ["pdftoppm", "-r", str(_dpi()), "-f", str(page), "-l", str(page), "-gray", "-png", "-singlefile", src, out_root],
+                check=True, capture_output=True, timeout=60,
+            )
+        except subprocess.CalledProcessError as e:
+            detail = e.stderr.decode("utf-8", errors="replace").strip().splitlines()
+            raise UnreadableLabelError(f"Label PDF could not be rendered: {detail[-1] if detail else e}") from e
+        except subprocess.TimeoutExpired as e:
+            raise UnreadableLabelError("Label PDF could not be rendered: timed out") from e
+        except OSError as e:
+            raise UnreadableLabelError(f"Label PDF could not be rendered: {e}") from e
+        with open(out_root + ".png", "rb") as f:
+            return f.read()
+
+
+def label_boxes(label_bytes: bytes, stats: Optional[Dict[str, int]] = None) -> Tuple[List[TextBox], Dict[str, int], Tuple[int, int]]:
+    """Return (line boxes, timings, (w, h)) for a raster image or PDF label.
+
+    stats is passed to ocr_boxes for its non-time counters.
+    """
+    if not is_pdf(label_bytes):
+        with open_label_image(label_bytes) as im:
+            size = im.size
+        boxes, timings = ocr_boxes(label_bytes, stats)
+        return boxes, timings, size
+
+    t0 = time.time()
+    text = pdf_text_boxes(label_bytes)
+    if text is not None:
+        boxes, size = text
+        return boxes, {"pdf_text_ms": int((time.time() - t0) * 1000)}, size
+
+    png = rasterize_pdf(label_bytes)
+    t_raster = {"pdf_raster_ms": int((time.time() - t0) * 1000)}
+    with Image.open(io.BytesIO(png)) as im:
+        size = im.size
+    boxes, timings = ocr_boxes(png, stats)
+    return boxes, {**t_raster, **timings}, size
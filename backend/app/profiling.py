@@ -0,0 +1,136 @@
+"""On-demand request profiling with flamegraph-ready output.
+
+A profiled request runs with a sampling thread that snapshots the request
+thread's Python stack every PROFILE_INTERVAL_MS and counts identical stacks.
+The result is saved in collapsed-stack format ("a;b;c <count>" per line),
+which flamegraph.pl, speedscope and inferno read directly.
+
+Profiling is enabled per request (profile flag / X-Profile header) or for
+1 in PROFILE_SAMPLE_N requests. When neither applies, `RequestProfiler` does
+a flag check only, so there is no sampling overhead. Profiles older than
+PROFILE_TTL_S are deleted whenever a new one is saved.
+"""
+
+from __future__ import annotations
+
+import itertools
+import os
+import re
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from collections import Counter
+from typing import Optional
+
+_PROFILE_ID_RE = re.compile(r"^[0-9a-f]{32}$")
+_request_counter = itertools.count(1)
+
+
+def _profile_dir() -> str:
+    return os.getenv("PROFILE_DIR", os.path.join(tempfile.gettempdir(), "alv_profiles"))
+
+
+def should_profile(requested: bool = False) -> bool:
+    """True if this request asked for a profile or is picked by 1-in-N sampling."""
+    if requested:
+        return True
+    n = int(os.getenv("PROFILE_SAMPLE_N", "0"))
+    return n > 0 and next(_request_counter) % n == 0
+
+
+def _frame_name(frame) -> str:
+    code = frame.f_code
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}"
+
+
+class RequestProfiler:
+    """Context manager that stack-samples the calling thread when enabled.
+
+    `profile_id` is set on exit when a profile was captured.
+    """
+
+    def __init__(self, enabled: bool):
+        self.enabled = enabled
+        self.profile_id: Optional[str] = None
+        self._stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def __enter__(self) -> "RequestProfiler":
+        if not self.enabled:
+            return self
+        self._tid = threading.get_ident()
+        # Stacks are cut at the frame that entered the profiler.
+        self._entry = sys._getframe(1)
+        interval = float(os.getenv("PROFILE_INTERVAL_MS", "5")) / 1000.0
+        self._thread = threading.Thread(target=self._sample, args=(interval,), daemon=True)
+        self._thread.start()
+        return self
+
+    def _sample(self, interval: float) -> None:
+        while not self._stop.wait(interval):
+            frame = sys._current_frames().get(self._tid)
+            names = []
+            while frame is not None:
+                names.append(_frame_name(frame))
+                if frame is self._entry:
+                    break
+                frame = frame.f_back
+            if names:
+                self._stacks[";".join(reversed(names))] += 1
+
+    def __exit__(self, *exc) -> None:
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._entry = None
+        self.profile_id = save_profile(self._stacks)
+
+
+def sweep_profiles(root: Optional[str] = None, max_age_s: Optional[float] = None) -> int:
+    """Delete profiles older than max_age_s (default PROFILE_TTL_S, 24h). Returns how many."""
+    root = root or _profile_dir()
+    if max_age_s is None:
+        max_age_s = float(os.getenv("PROFILE_TTL_S", "86400"))
+    cutoff = time.time() - max_age_s
+    removed = 0
+    try:
+        names = os.listdir(root)
+    except OSError:
+        return 0
+    for name in names:
+        path = os.path.join(root, name)
+        if not (name.endswith(".collapsed") and _PROFILE_ID_RE.match(name[:-len(".collapsed")])):
+            continue
+        try:
+            if os.path.getmtime(path) < cutoff:
+                os.remove(path)
+                removed += 1
+        except OSError:
+            continue
+    return removed
+
+
+def save_profile(stacks: Counter) -> str:
+    profile_id = uuid.uuid4().hex
+    root = _profile_dir()
+    os.makedirs(root, exist_ok=True)
+    sweep_profiles(root)
+    with open(os.path.join(root, f"{profile_id}.collapsed"), "w", encoding="utf-8") as f:
+        for stack, count in stacks.most_common():
+            f.write(f"{stack} {count}\n")
+    return profile_id
+
+
+def load_profile(profile_id: str) -> str:
+    """Return a stored collapsed-stack profile. Raises KeyError if unknown."""
+    if not _PROFILE_ID_RE.match(profile_id or ""):
+        raise KeyError(profile_id)
+    try:
+        with open(os.path.join(_profile_dir(), f"{profile_id}.collapsed"), encoding="utf-8") as f:
+            return f.read()
+    except OSError:
+        raise KeyError(profile_id)
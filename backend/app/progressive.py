@@ -0,0 +1,96 @@
+"""Progressive (early-exit) verification for triage queues.
+
+The label is OCR'd in ordered horizontal bands and `compare` is re-evaluated
+after each band. Remaining bands are skipped once `overall_status` can no
+longer change:
+
+- Every check is already PASS. More text only adds candidates, and each check
+  keeps its best-scoring candidate, so a PASS cannot be lost.
+- The brand check is not PASS once the brand band has been read. Brand
+  candidates only come from lines whose top is in the top 40% of the label,
+  and bands are assigned by line top too, so the brand result is final and
+  the label is NEEDS_REVIEW whatever the other bands contain. A brand-band
+  line cut off by the band's crop is read with the next band, and the brand
+  only becomes final once it has been.
+"""
+
+from __future__ import annotations
+
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from .models import ApplicationFields, CheckItem, ExtractedFields
+from .ocr import binarize_label, ocr_regions
+from .pdf import is_pdf, pdf_text_boxes, rasterize_pdf
+from .extract import BRAND_REGION_END, extract_fields
+from .compare import compare
+
+# (name, y_start, y_end) as fractions of label height, in OCR order.
+# The brand band is the brand-candidate region used by extract_fields.
+PROGRESSIVE_REGIONS: List[Tuple[str, float, float]] = [
+    ("brand", 0.0, BRAND_REGION_END),
+    ("abv_net", BRAND_REGION_END, 0.7),
+    ("warning", 0.7, 1.0),
+]
+
+
+def overall_from_items(items: List[CheckItem]) -> str:
+    return "PASS" if all(i.status == "PASS" for i in items) else "NEEDS_REVIEW"
+
+
+def is_decided(items: List[CheckItem], brand_final: bool) -> bool:
+    """Return True when reading more of the label cannot change overall_status."""
+    if all(i.status == "PASS" for i in items):
+        return True
+    if brand_final:
+        brand = next((i for i in items if i.field == "brand_name"), None)
+        if brand is not None and brand.status != "PASS":
+            return True
+    return False
+
+
+def verify_progressive(image_bytes: bytes, app_fields: ApplicationFields, brand_index=None, rule_timings_us: Optional[Dict[str, int]] = None) -> Tuple[List[CheckItem], ExtractedFields, Dict[str, int], Dict[str, Any]]:
+    """Run OCR -> extract -> compare band by band, stopping once decided.
+
+    Returns (items, extracted_fields, timings, progressive_info) where
+    progressive_info records which regions were OCR'd and which were skipped.
+    extracted_fields covers only the regions that were read. rule_timings_us
+    receives rule scoring time summed over every band's compare.
+    """
+    t0 = time.time()
+    if is_pdf(image_bytes):
+        text = pdf_text_boxes(image_bytes)
+        if text is not None:
+            # Text-layer PDFs need no OCR, so there is nothing to skip.
+            boxes, (w, h) = text
+            ext = extract_fields(boxes, image_w=w, image_h=h)
+            timings: Dict[str, int] = {}
+            items = compare(app_fields, ext, brand_index=brand_index, rule_timings_us=rule_timings_us)
+            timings["pdf_text_ms"] = int((time.time() - t0) * 1000)
+            return items, ext, timings, {"regions_read": ["text_layer"], "regions_skipped": []}
+        image_bytes = rasterize_pdf(image_bytes)
+
+    gray = binarize_label(image_bytes)
+    # Band boundaries are in binarized-image pixels, so extract in the same space.
+    img_h, img_w = gray.shape[:2]
+
+    items: List[CheckItem] = []
+    read: List[str] = []
+    compare_ms = 0
+    ends = {name: end for name, _, end in PROGRESSIVE_REGIONS}
+    for name, boxes, _, complete in ocr_regions(gray, PROGRESSIVE_REGIONS):
+        read.append(name)
+        t1 = time.time()
+        ext = extract_fields(boxes, image_w=img_w, image_h=img_h)
+        items = compare(app_fields, ext, brand_index=brand_index, rule_timings_us=rule_timings_us)
+        compare_ms += int((time.time() - t1) * 1000)
+        if is_decided(items, brand_final=complete and ends[name] >= BRAND_REGION_END):
+            break
+
+    skipped = [name for name, _, _ in PROGRESSIVE_REGIONS if name not in read]
+    timings = {
+        "ocr_ms": int((time.time() - t0) * 1000) - compare_ms,
+        "extract_compare_ms": compare_ms,
+    }
+    info = {"regions_read": read, "regions_skipped": skipped}
+    return items, ext, timings, info
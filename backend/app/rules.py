@@ -0,0 +1,274 @@
+"""Declarative field rules, compiled once and evaluated in a single pass.
+
+Each rule compares one application field against the label's OCR lines:
+
+  field         name of the CheckItem it produces
+  enabled       false to ship a rule switched off (default true); RULES_ENABLE
+                (comma-separated fields) switches rules on without editing the file
+  app_field     ApplicationFields attribute holding the expected value; the
+                rule is skipped when it is empty/False
+  expected      fixed expected text, for boolean app fields (e.g. sulfites)
+  line_pattern  optional regex; only lines matching it are candidates
+  ignore_case   apply re.IGNORECASE to line_pattern
+  normalize     "abv" | "net_contents" | "text" (applied to both sides)
+  score         "ratio" | "contains" | "token_set_ratio"
+  pass/review   thresholds for PASS / REVIEW; below review is FAIL
+  missing_note  note used when no candidate line scores above 0
+
+Rules load from RULES_PATH (JSON, or YAML when PyYAML is installed), falling
+back to rules.json next to this module. All line_patterns are compiled into
+one alternation of zero-width lookaheads, so a single finditer per line finds
+every position where some rule matches; a rule that also matches at a
+position claimed by an earlier alternative is confirmed with an anchored
+match there. Adding a rule adds an alternative, not a pass over the lines.
+
+Patterns are validated on their own first, so constructs that break inside
+the combined matcher (inline global flags, numbered backreferences, group
+names reused by another rule) are reported against the rule that uses them.
+"""
+
+from __future__ import annotations
+
+import copy
+import json
+import os
+import re
+import threading
+import time
+from dataclasses import dataclass, replace
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from rapidfuzz import fuzz
+
+from .models import ApplicationFields, CheckItem, TextBox
+from .thresholds import get_thresholds
+from .utils import normalize_abv, normalize_net_contents, normalize_text
+
+DEFAULT_RULES_PATH = os.path.join(os.path.dirname(__file__), "rules.json")
+
+_GROUP_PREFIX = "_rule"
+# (?:\\\\)* skips escaped backslashes, so a literal backslash followed by "1" is not a backreference.
+_GLOBAL_FLAGS_RE = re.compile(r"(?<!\\)(?:\\\\)*\(\?[aiLmsux]+\)")
+_NUMBERED_REF_RE = re.compile(r"(?<!\\)(?:\\\\)*(?:\\[1-9]|\(\?\(\d)")
+
+
+def _contains(expected: str, found: str) -> float:
+    # Best-aligned window of the line; a line shorter than the expected value
+    # is compared whole so fragments ("LLC") cannot score 1.0.
+    if len(found) >= len(expected):
+        return fuzz.partial_ratio(expected, found) / 100.0
+    return fuzz.ratio(expected, found) / 100.0
+
+
+NORMALIZERS: Dict[str, Callable[[str], str]] = {
+    "abv": normalize_abv,
+    "net_contents": normalize_net_contents,
+    "text": normalize_text,
+}
+
+SCORERS: Dict[str, Callable[[str, str], float]] = {
+    "ratio": lambda e, f: fuzz.ratio(e, f) / 100.0,
+    "contains": _contains,
+    "token_set_ratio": lambda e, f: fuzz.token_set_ratio(e, f) / 100.0,
+}
+
+
+@dataclass(frozen=True)
+class Rule:
+    field: str
+    app_field: str
+    normalize: Callable[[str], str]
+    score: Callable[[str, str], float]
+    pass_th: float
+    review_th: float
+    missing_note: str
+    expected: Optional[str] = None
+    group: Optional[str] = None  # group name in the combined matcher, if line_pattern is set
+
+    def expected_value(self, app: ApplicationFields) -> Optional[str]:
+        value = getattr(app, self.app_field, None)
+        if isinstance(value, bool):
+            return self.expected if value else None
+        return value or None
+
+
+def _check_pattern(pattern: str, ignore_case: bool, names: set) -> "re.Pattern[str]":
+    """Compile a rule's line_pattern alone and reject what the combined matcher cannot hold."""
+    compiled = re.compile(pattern, re.IGNORECASE if ignore_case else 0)
+    if _GLOBAL_FLAGS_RE.search(pattern):
+        raise ValueError("inline global flags such as (?i) are not supported; use ignore_case or a scoped (?i:...) group")
+    if _NUMBERED_REF_RE.search(pattern):
+        raise ValueError("numbered backreferences are not supported; use (?P<name>...) with (?P=name)")
+    reserved = [n for n in compiled.groupindex if n.startswith(_GROUP_PREFIX)]
+    if reserved:
+        raise ValueError(f"group names starting with {_GROUP_PREFIX!r} are reserved: {reserved}")
+    reused = sorted(set(compiled.groupindex) & names)
+    if reused:
+        raise ValueError(f"group names {reused} are already used by another rule")
+    names.update(compiled.groupindex)
+    return compiled
+
+
+def status_from_score(score: float, pass_th: float, review_th: float) -> str:
+    if score >= pass_th:
+        return "PASS"
+    if score >= review_th:
+        return "REVIEW"
+    return "FAIL"
+
+
+class RuleSet:
+    """Compiled rules plus the combined line matcher."""
+
+    def __init__(self, specs: List[Dict[str, Any]], enable: Iterable[str] = ()):
+        enable = set(enable)
+        rules: List[Rule] = []
+        alternatives: List[str] = []
+        patterns: Dict[str, "re.Pattern[str]"] = {}  # group -> standalone pattern
+        names: set = set()
+        for i, spec in enumerate(specs):
+            name = spec.get("field") or f"#{i}"
+            if not spec.get("enabled", True) and name not in enable:
+                continue
+            try:
+                group = None
+                if spec.get("line_pattern"):
+                    pattern = spec["line_pattern"]
+                    group = f"{_GROUP_PREFIX}{i}"
+                    patterns[group] = _check_pattern(pattern, bool(spec.get("ignore_case")), names)
+                    flags = "(?i:" if spec.get("ignore_case") else "(?:"
+                    alternatives.append(f"(?=(?P<{group}>{flags}{pattern})))")
+                rules.append(Rule(
+                    field=spec["field"],
+                    app_field=spec.get("app_field", spec["field"]),
+                    normalize=NORMALIZERS[spec.get("normalize", "text")],
+                    score=SCORERS[spec.get("score", "ratio")],
+                    pass_th=float(spec["pass"]),
+                    review_th=float(spec["review"]),
+                    missing_note=spec.get("missing_note", f"No {spec['field']} detected"),
+                    expected=spec.get("expected"),
+                    group=group,
+                ))
+            except (KeyError, TypeError, ValueError, re.error) as e:
+                raise ValueError(f"Invalid rule {name}: {type(e).__name__}: {e}") from e
+
+        unknown = [r.app_field for r in rules if r.app_field not in ApplicationFields.model_fields]
+        if unknown:
+            raise ValueError(f"Rules reference unknown application fields: {unknown}")
+
+        self.rules = rules
+        self._matcher = re.compile("|".join(alternatives)) if alternatives else None
+        # Alternatives in matcher order, as (matcher group index, group name, standalone pattern).
+        self._alternatives = [(self._matcher.groupindex[g], g, patterns[g]) for g in patterns] if alternatives else []
+        self._order = {idx: k for k, (idx, _, _) in enumerate(self._alternatives)}
+
+    def _matching_groups(self, text: str, wanted: set) -> set:
+        """Groups (of those wanted) whose pattern matches somewhere in text, in one scan.
+
+        At each position the alternation reports only the first matching
+        alternative, so later alternatives not seen yet are tried anchored at
+        the positions where a match was found.
+        """
+        found: set = set()
+        for m in self._matcher.finditer(text):
+            k = self._order[m.lastindex]
+            for _, g, rx in self._alternatives[k:]:
+                if g in wanted and g not in found and (g == self._alternatives[k][1] or rx.match(text, m.start())):
+                    found.add(g)
+            if found >= wanted:
+                break
+        return found
+
+    def with_thresholds(self, thresholds: Dict[str, Dict[str, float]]) -> "RuleSet":
+        """Return a copy whose rules take pass/review from thresholds[field] where given."""
+        out = copy.copy(self)
+        out.rules = [
+            replace(r, pass_th=float(thresholds[r.field].get("pass", r.pass_th)),
+                    review_th=float(thresholds[r.field].get("review", r.review_th)))
+            if r.field in thresholds else r
+            for r in self.rules
+        ]
+        return out
+
+    def _best(self, app: ApplicationFields, lines: List[TextBox]):
+        """One pass over lines: (active rules, best scores, best lines, seconds spent per rule)."""
+        active = []
+        for rule in self.rules:
+            expected = rule.expected_value(app)
+            if expected:
+                active.append((rule, expected, rule.normalize(expected)))
+
+        wanted = {r.group for r, _, _ in active if r.group}
+        best_score = [0.0] * len(active)
+        best_tb: List[Optional[TextBox]] = [None] * len(active)
+        spent = [0.0] * len(active)
+
+        for tb in lines if active else ():
+            hits = self._matching_groups(tb.text, wanted) if wanted else set()
+            for k, (rule, _, exp_n) in enumerate(active):
+                if rule.group and rule.group not in hits:
+                    continue
+                t = time.perf_counter()
+                found = rule.normalize(tb.text)
+                s = rule.score(exp_n, found) if exp_n and found else 0.0
+                spent[k] += time.perf_counter() - t
+                if s > best_score[k]:
+                    best_score[k], best_tb[k] = s, tb
+        return active, best_score, best_tb, spent
+
+    def scores(self, app: ApplicationFields, lines: List[TextBox]) -> Dict[str, Optional[float]]:
+        """Unrounded best score per applicable rule; None when no candidate line was found."""
+        active, best_score, best_tb, _ = self._best(app, lines)
+        return {rule.field: (best_score[k] if best_tb[k] is not None else None) for k, (rule, _, _) in enumerate(active)}
+
+    def evaluate(self, app: ApplicationFields, lines: List[TextBox], rule_timings_us: Optional[Dict[str, int]] = None) -> List[CheckItem]:
+        """Score every applicable rule against the lines in one pass.
+
+        Per-rule scoring time (microseconds) is added to rule_timings_us[field].
+        """
+        active, best_score, best_tb, spent = self._best(app, lines)
+
+        items: List[CheckItem] = []
+        for k, (rule, expected, _) in enumerate(active):
+            if rule_timings_us is not None:
+                rule_timings_us[rule.field] = rule_timings_us.get(rule.field, 0) + int(spent[k] * 1e6)
+            tb = best_tb[k]
+            if tb is None:
+                items.append(CheckItem(field=rule.field, status="MISSING", expected=expected, notes=rule.missing_note))
+                continue
+            st = status_from_score(best_score[k], rule.pass_th, rule.review_th)
+            items.append(CheckItem(field=rule.field, status=st, expected=expected, found=tb.text, confidence=round(best_score[k], 3), bbox_ids=[tb.id]))
+        return items
+
+
+def load_rule_specs(path: str) -> List[Dict[str, Any]]:
+    with open(path, encoding="utf-8") as f:
+        if path.endswith((".yaml", ".yml")):
+            try:
+                import yaml
+            except ImportError:
+                raise RuntimeError(f"PyYAML is required to load {path}; install it or use JSON")
+            data = yaml.safe_load(f)
+        else:
+            data = json.load(f)
+    return data["rules"] if isinstance(data, dict) else data
+
+
+_RULES: Optional[RuleSet] = None
+_RULES_LOCK = threading.Lock()
+
+
+def get_rules() -> RuleSet:
+    """Return the process-wide compiled rules (RULES_PATH or the bundled rules.json).
+
+    Fields listed in RULES_ENABLE are switched on even if the file disables
+    them. Thresholds from THRESHOLDS_PATH (see thresholds.py) override the file's.
+    """
+    global _RULES
+    if _RULES is None:
+        with _RULES_LOCK:
+            if _RULES is None:
+                enable = [f.strip() for f in os.getenv("RULES_ENABLE", "").split(",") if f.strip()]
+                rules = RuleSet(load_rule_specs(os.getenv("RULES_PATH") or DEFAULT_RULES_PATH), enable=enable)
+                _RULES = rules.with_thresholds(get_thresholds())
+    return _RULES
@@ -0,0 +1,345 @@
+"""Coordinator/worker sharding for batch verification across nodes.
+
+The coordinator splits a batch's label/application pairs into shards, puts
+them on a broker, and yields results back in submission order. Workers
+claim shards, run `verify_application_pair` on each pair and post results.
+A claimed shard whose lease expires (worker died or hung) is requeued, up to
+MAX_ATTEMPTS, so a lost worker only delays its shard.
+
+Brokers are pluggable; two are provided:
+- InProcessBroker: queues in memory, with worker threads in this process.
+- FilesystemBroker: a shared directory (pending/ claimed/ results/) using
+  atomic renames, so workers on other nodes only need the same mount.
+
+Configure with BATCH_BROKER:
+- unset/empty: no sharding, batches run in the request process
+- "inprocess" or "inprocess:<n_workers>"
+- "fs:<shared dir>" (start workers with `python -m app.sharding worker fs:<dir>`)
+"""
+
+from __future__ import annotations
+
+import argparse
+import base64
+import json
+import os
+import queue
+import socket
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from collections import deque
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+SHARD_SIZE = int(os.getenv("BATCH_SHARD_SIZE", "8"))
+LEASE_S = float(os.getenv("BATCH_LEASE_S", "120"))
+MAX_ATTEMPTS = int(os.getenv("BATCH_MAX_ATTEMPTS", "3"))
+# Shards kept in flight ahead of the next result to yield; bounds coordinator memory.
+MAX_INFLIGHT = int(os.getenv("BATCH_MAX_INFLIGHT", "32"))
+
+Pair = Tuple[str, str, bytes, Dict[str, Any]]  # (folder, label_key, label_bytes, app_data)
+
+
+class Broker(ABC):
+    """Task transport between coordinator and workers.
+
+    Tasks and results are JSON-serializable dicts keyed by task["task_id"].
+    """
+
+    @abstractmethod
+    def put_task(self, task: Dict[str, Any]) -> None: ...
+
+    @abstractmethod
+    def claim_task(self, worker_id: str, timeout: float = 1.0) -> Optional[Dict[str, Any]]:
+        """Take a pending task and start its lease, or return None after timeout."""
+
+    @abstractmethod
+    def complete_task(self, task_id: str, result: Dict[str, Any]) -> None: ...
+
+    @abstractmethod
+    def pop_result(self, task_id: str) -> Optional[Dict[str, Any]]:
+        """Return and remove a finished result, or None if not done yet."""
+
+    @abstractmethod
+    def requeue_expired(self, lease_s: float, prefix: str = "") -> List[Dict[str, Any]]:
+        """Move tasks claimed longer than lease_s ago back to pending; return them.
+
+        Only task ids starting with prefix are considered, so coordinators
+        sharing a broker each requeue just their own batch.
+        """
+
+
+class InProcessBroker(Broker):
+    def __init__(self):
+        self._pending: "queue.Queue[Dict[str, Any]]" = queue.Queue()
+        self._claimed: Dict[str, Tuple[Dict[str, Any], float]] = {}
+        self._results: Dict[str, Dict[str, Any]] = {}
+        # Ids put but not completed yet. As with FilesystemBroker's task files,
+        # the first completion removes the id and posts the result; requeued
+        # duplicates and late completions find it gone and are dropped, so
+        # nothing is kept for ids whose results were already popped.
+        self._open: set = set()
+        self._lock = threading.Lock()
+
+    def put_task(self, task):
+        with self._lock:
+            self._open.add(task["task_id"])
+        self._pending.put(task)
+
+    def claim_task(self, worker_id, timeout=1.0):
+        deadline = time.time() + timeout
+        while True:
+            try:
+                task = self._pending.get(timeout=max(0.0, deadline - time.time()))
+            except queue.Empty:
+                return None
+            with self._lock:
+                if task["task_id"] not in self._open:
+                    continue
+                self._claimed[task["task_id"]] = (task, time.time())
+            return task
+
+    def complete_task(self, task_id, result):
+        with self._lock:
+            # A requeued task may finish twice; keep the first result.
+            self._claimed.pop(task_id, None)
+            if task_id in self._open:
+                self._open.discard(task_id)
+                self._results[task_id] = result
+
+    def pop_result(self, task_id):
+        with self._lock:
+            return self._results.pop(task_id, None)
+
+    def requeue_expired(self, lease_s, prefix=""):
+        now = time.time()
+        with self._lock:
+            expired = [tid for tid, (_, t) in self._claimed.items() if tid.startswith(prefix) and now - t > lease_s]
+            tasks = [self._claimed.pop(tid)[0] for tid in expired]
+        for task in tasks:
+            self._pending.put(task)
+        return tasks
+
+
+class FilesystemBroker(Broker):
+    """Broker over a shared directory; each state change is an atomic rename."""
+
+    def __init__(self, root: str):
+        self.root = root
+        self.pending = os.path.join(root, "pending")
+        self.claimed = os.path.join(root, "claimed")
+        self.results = os.path.join(root, "results")
+        for d in (self.pending, self.claimed, self.results):
+            os.makedirs(d, exist_ok=True)
+
+    def _write_tmp(self, name: str, obj: Dict[str, Any]) -> str:
+        tmp = os.path.join(self.root, f".{name}.{uuid.uuid4().hex}.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(obj, f)
+        return tmp
+
+    def _write(self, directory: str, name: str, obj: Dict[str, Any]) -> None:
+        os.replace(self._write_tmp(name, obj), os.path.join(directory, name))
+
+    def put_task(self, task):
+        self._write(self.pending, f"{task['task_id']}.json", task)
+
+    def claim_task(self, worker_id, timeout=1.0):
+        deadline = time.time() + timeout
+        while True:
+            for name in sorted(os.listdir(self.pending)):
+                src = os.path.join(self.pending, name)
+                dst = os.path.join(self.claimed, name)
+                try:
+                    # Start the lease before the file shows up in claimed/, so a
+                    # task that waited in pending is not seen as expired.
+                    os.utime(src)
+                    os.rename(src, dst)  # only one worker wins the rename
+                except OSError:
+                    continue
+                with open(dst, encoding="utf-8") as f:
+                    return json.load(f)
+            if time.time() >= deadline:
+                return None
+            time.sleep(0.05)
+
+    def complete_task(self, task_id, result):
+        name = f"{task_id}.json"
+        tmp = self._write_tmp(name, result)
+        # Whoever removes the task file (claimed, or requeued after a slow
+        # worker's lease expired) posts the result. A duplicate finishing
+        # later finds no task file and drops its result, so it cannot leave
+        # an orphan behind once the coordinator has popped the first one.
+        owner = False
+        for directory in (self.claimed, self.pending):
+            try:
+                os.remove(os.path.join(directory, name))
+                owner = True
+            except OSError:
+                pass
+        if owner:
+            os.replace(tmp, os.path.join(self.results, name))
+        else:
+            os.remove(tmp)
+
+    def pop_result(self, task_id):
+        path = os.path.join(self.results, f"{task_id}.json")
+        try:
+            with open(path, encoding="utf-8") as f:
+                result = json.load(f)
+        except (OSError, ValueError):
+            return None
+        os.remove(path)
+        return result
+
+    def requeue_expired(self, lease_s, prefix=""):
+        now = time.time()
+        tasks = []
+        for name in os.listdir(self.claimed):
+            if not name.startswith(prefix):
+                continue
+            path = os.path.join(self.claimed, name)
+            try:
+                if now - os.path.getmtime(path) <= lease_s:
+                    continue
+                with open(path, encoding="utf-8") as f:
+                    task = json.load(f)
+                os.rename(path, os.path.join(self.pending, name))
+            except (OSError, ValueError):
+                continue
+            tasks.append(task)
+        return tasks
+
+
+def error_result(message: str) -> Dict[str, Any]:
+    """Result recorded for a pair that could not be verified."""
+    return {"overall_status": "NEEDS_REVIEW", "items": [], "timings_ms": {}, "error": message}
+
+
+def run_worker(
+    broker: Broker,
+    worker_id: Optional[str] = None,
+    stop: Optional[threading.Event] = None,
+    verify: Optional[Callable[..., Dict[str, Any]]] = None,
+) -> None:
+    """Claim and process shards until `stop` is set."""
+    if verify is None:
+        from .verify import verify_application_pair as verify
+    worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}-{threading.get_ident()}"
+    stop = stop or threading.Event()
+    while not stop.is_set():
+        task = broker.claim_task(worker_id, timeout=0.5)
+        if task is None:
+            continue
+        results = []
+        for item in task["items"]:
+            try:
+                results.append(verify(base64.b64decode(item["label_b64"]), item["app"], progressive=task.get("progressive", False)))
+            except Exception as e:
+                results.append(error_result(f"{type(e).__name__}: {e}"))
+        broker.complete_task(task["task_id"], {"task_id": task["task_id"], "worker": worker_id, "results": results})
+
+
+def run_sharded(
+    pairs: Iterable[Pair],
+    broker: Broker,
+    progressive: bool = False,
+    shard_size: int = SHARD_SIZE,
+    lease_s: float = LEASE_S,
+    max_attempts: int = MAX_ATTEMPTS,
+    poll_s: float = 0.05,
+) -> Iterator[Tuple[str, str, bytes, Dict[str, Any], Dict[str, Any]]]:
+    """Dispatch pairs in shards and yield (folder, label_key, label_bytes, app_data, result) in input order."""
+    batch = uuid.uuid4().hex[:12]
+    it = iter(pairs)
+    inflight: deque = deque()  # (task_id, shard pairs)
+    attempts: Dict[str, int] = {}
+    shard_no = 0
+    exhausted = False
+
+    def submit() -> bool:
+        nonlocal shard_no
+        shard = []
+        for pair in it:
+            shard.append(pair)
+            if len(shard) >= shard_size:
+                break
+        if not shard:
+            return False
+        task_id = f"{batch}-{shard_no:06d}"
+        shard_no += 1
+        broker.put_task({
+            "task_id": task_id,
+            "progressive": progressive,
+            "items": [{"label_b64": base64.b64encode(p[2]).decode("ascii"), "app": p[3]} for p in shard],
+        })
+        attempts[task_id] = 1
+        inflight.append((task_id, shard))
+        return True
+
+    while True:
+        while not exhausted and len(inflight) < MAX_INFLIGHT:
+            exhausted = not submit()
+        if not inflight:
+            return
+
+        task_id, shard = inflight[0]
+        result = broker.pop_result(task_id)
+        if result is None:
+            for task in broker.requeue_expired(lease_s, prefix=f"{batch}-"):
+                tid = task["task_id"]
+                if tid not in attempts:
+                    continue  # already given up on by this coordinator
+                attempts[tid] += 1
+                if attempts[tid] > max_attempts:
+                    # Give up on this shard; report its pairs as errors.
+                    n = len(task["items"])
+                    del attempts[tid]
+                    broker.complete_task(tid, {"task_id": tid, "results": [error_result("worker lost; retries exhausted")] * n})
+            time.sleep(poll_s)
+            continue
+
+        inflight.popleft()
+        attempts.pop(task_id, None)
+        for pair, res in zip(shard, result["results"]):
+            yield (*pair, res)
+
+
+_BROKER: Optional[Broker] = None
+_BROKER_LOCK = threading.Lock()
+
+
+def get_broker() -> Optional[Broker]:
+    """Return the broker configured by BATCH_BROKER, or None when sharding is off."""
+    global _BROKER
+    spec = os.getenv("BATCH_BROKER", "").strip()
+    if not spec:
+        return None
+    with _BROKER_LOCK:
+        if _BROKER is None:
+            if spec.startswith("fs:"):
+                _BROKER = FilesystemBroker(spec[3:])
+            elif spec.split(":", 1)[0] == "inprocess":
+                n = int(spec.split(":", 1)[1]) if ":" in spec else (os.cpu_count() or 2)
+                _BROKER = InProcessBroker()
+                for i in range(n):
+                    threading.Thread(target=run_worker, args=(_BROKER, f"local-{i}"), daemon=True).start()
+            else:
+                raise ValueError(f"Unknown BATCH_BROKER: {spec}")
+    return _BROKER
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Batch verification worker")
+    ap.add_argument("command", choices=["worker"])
+    ap.add_argument("broker", help="fs:<shared dir>")
+    args = ap.parse_args()
+
+    if not args.broker.startswith("fs:"):
+        ap.error("workers on other nodes need a shared broker, e.g. fs:/mnt/batches")
+    run_worker(FilesystemBroker(args.broker[3:]))
+
+
+if __name__ == "__main__":
+    main()
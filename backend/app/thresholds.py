@@ -0,0 +1,55 @@
+"""Score thresholds for the bespoke checks, overridable from a tuned config.
+
+THRESHOLDS_PATH points at a JSON file (e.g. written by
+scripts/tune_thresholds.py) mapping check fields to thresholds:
+
+  {"brand_name": {"pass": 0.85, "review": 0.70},
+   "government_warning": {"clause": 0.92, "full": 0.88, "review": 0.80},
+   "abv": {"pass": 0.95, "review": 0.80}}
+
+brand_name and government_warning are used by compare; any other field
+overrides the pass/review thresholds of the rule with that name (rules.json).
+Missing keys keep their defaults. The file is read once, at startup.
+"""
+
+from __future__ import annotations
+
+import copy
+import json
+import os
+import threading
+from typing import Dict, Optional
+
+DEFAULT_THRESHOLDS: Dict[str, Dict[str, float]] = {
+    "brand_name": {"pass": 0.85, "review": 0.70},
+    # clause: each warning clause; full: whole text; review: either clause, header present
+    "government_warning": {"clause": 0.92, "full": 0.88, "review": 0.80},
+}
+
+
+def load_thresholds(path: Optional[str]) -> Dict[str, Dict[str, float]]:
+    """Defaults merged with the overrides in path (if any)."""
+    merged = copy.deepcopy(DEFAULT_THRESHOLDS)
+    if not path:
+        return merged
+    with open(path, encoding="utf-8") as f:
+        overrides = json.load(f)
+    for field, values in overrides.items():
+        if not isinstance(values, dict):
+            raise ValueError(f"Thresholds for {field} must be an object, got {values!r}")
+        merged.setdefault(field, {}).update({k: float(v) for k, v in values.items()})
+    return merged
+
+
+_THRESHOLDS: Optional[Dict[str, Dict[str, float]]] = None
+_THRESHOLDS_LOCK = threading.Lock()
+
+
+def get_thresholds() -> Dict[str, Dict[str, float]]:
+    """Return the process-wide thresholds (THRESHOLDS_PATH over the defaults)."""
+    global _THRESHOLDS
+    if _THRESHOLDS is None:
+        with _THRESHOLDS_LOCK:
+            if _THRESHOLDS is None:
+                _THRESHOLDS = load_thresholds(os.getenv("THRESHOLDS_PATH"))
+    return _THRESHOLDS
@@ -1,26 +1,22 @@
-"""Internal verification helper used for batch pair endpoint.
+"""Label verification pipeline (OCR -> extract -> compare).
 
-This mirrors the /api/verify endpoint logic (OCR -> extract -> compare) but
-accepts raw image bytes and application values.
+verify_label is used by the /api/verify endpoints; the dict-returning helpers
+serve batch pairs and shard workers.
 """
 
 from __future__ import annotations
 
-import io
 import time
-from typing import Any, Dict, Optional, Tuple
+from typing import Any, Dict, Optional
 
-from PIL import Image
-
-from .models import ApplicationFields
-from .ocr import ocr_boxes
+from .models import ApplicationFields, VerificationResult
+from .pdf import label_boxes
 from .extract import extract_fields
 from .compare import compare
-
-
-def _image_size_from_bytes(image_bytes: bytes) -> Tuple[int, int]:
-    with Image.open(io.BytesIO(image_bytes)) as im:
-        return im.size  # (w, h)
+from .progressive import overall_from_items, verify_progressive
+from .lang import label_languages
+from .brand_index import get_brand_index
+from .profiling import RequestProfiler, should_profile
 
 
 def verify_label_bytes(
@@ -29,52 +25,82 @@ def verify_label_bytes(
     abv: Optional[str],
     net_contents: Optional[str],
     require_gov_warning: bool = True,
+    progressive: bool = False,
+    profile: bool = False,
 ) -> Dict[str, Any]:
-    t0 = time.time()
-
     app_fields = ApplicationFields(
         brand_name=brand_name or "",
         abv=abv,
         net_contents=net_contents,
         require_gov_warning=require_gov_warning,
     )
+    return verify_label_fields(label_bytes, app_fields, progressive=progressive, profile=profile)
 
-    w, h = _image_size_from_bytes(label_bytes)
 
-    boxes, t_ocr = ocr_boxes(label_bytes)
-    t1 = time.time()
+def verify_label_fields(
+    label_bytes: bytes,
+    app_fields: ApplicationFields,
+    progressive: bool = False,
+    profile: bool = False,
+) -> Dict[str, Any]:
+    """verify_label as a plain dict; keys that are unset (None) are left out."""
+    result = verify_label(label_bytes, app_fields, progressive=progressive, profile=profile)
+    return {k: v for k, v in result.model_dump().items() if v is not None}
 
-    ext = extract_fields(boxes, image_w=w, image_h=h)
-    items = compare(app_fields, ext)
 
-    overall = "PASS" if all(getattr(i, "status", None) == "PASS" for i in items) else "NEEDS_REVIEW"
+def verify_label(
+    label_bytes: bytes,
+    app_fields: ApplicationFields,
+    progressive: bool = False,
+    profile: bool = False,
+    debug: bool = False,
+) -> VerificationResult:
+    """Run OCR -> extract -> compare for one label; shared by the API endpoints and batches."""
+    with RequestProfiler(should_profile(profile)) as prof:
+        result = _verify_label(label_bytes, app_fields, progressive, debug)
+    result.profile_id = prof.profile_id
+    return result
+
+
+def _verify_label(label_bytes: bytes, app_fields: ApplicationFields, progressive: bool, debug: bool) -> VerificationResult:
+    t0 = time.time()
+
+    brand_index = get_brand_index()
+    ocr_stats: Dict[str, int] = {}
+    rule_timings: Dict[str, int] = {}
+
+    if progressive:
+        items, ext, t_stages, prog_info = verify_progressive(label_bytes, app_fields, brand_index=brand_index, rule_timings_us=rule_timings)
+        num_boxes = None
+    else:
+        boxes, t_ocr, (w, h) = label_boxes(label_bytes, stats=ocr_stats)
+        t1 = time.time()
+
+        ext = extract_fields(boxes, image_w=w, image_h=h)
+        items = compare(app_fields, ext, brand_index=brand_index, rule_timings_us=rule_timings)
+        t_stages = {**t_ocr, "extract_compare_ms": int((time.time() - t1) * 1000)}
+        prog_info = None
+        num_boxes = len(boxes)
+
+    brand_index.register(app_fields.brand_name)
 
     timings = {
-        **(t_ocr or {}),
-        "extract_compare_ms": int((time.time() - t1) * 1000),
+        **t_stages,
         "total_ms": int((time.time() - t0) * 1000),
     }
 
-    # Convert pydantic models to dict-friendly objects
-    items_out = []
-    for i in items:
-        try:
-            items_out.append(i.model_dump())
-        except Exception:
-            try:
-                items_out.append(i.dict())
-            except Exception:
-                items_out.append({
-                    "field": getattr(i, "field", None),
-                    "status": getattr(i, "status", None),
-                    "expected": getattr(i, "expected", None),
-                    "found": getattr(i, "found", None),
-                    "confidence": getattr(i, "confidence", None),
-                    "notes": getattr(i, "notes", None),
-                })
-
-    return {
-        "overall_status": overall,
-        "items": items_out,
-        "timings_ms": timings,
-    }
+    return VerificationResult(
+        overall_status=overall_from_items(items),
+        items=items,
+        timings_ms=timings,
+        rule_timings_us=rule_timings,
+        progressive=prog_info,
+        languages=label_languages(ext.paragraphs),
+        ocr_stats=ocr_stats,
+        debug={"num_boxes": num_boxes} if debug else None,
+    )
+
+
+def verify_application_pair(label_bytes: bytes, app_data: Dict[str, Any], progressive: bool = False) -> Dict[str, Any]:
+    """Verify a label against a parsed application.json dict (batch pairs / shard workers)."""
+    return verify_label_fields(label_bytes, ApplicationFields.from_application_json(app_data), progressive=progressive)
@@ -0,0 +1,9 @@
+import pytest
+
+import app.brand_index as brand_index
+
+@pytest.fixture(autouse=True)
+def isolated_brand_index(tmp_path, monkeypatch):
+    # Verification registers brands in the process-wide index; keep it per test.
+    monkeypatch.setenv("BRAND_INDEX_PATH", str(tmp_path / "brand_index.ndjson"))
+    monkeypatch.setattr(brand_index, "_INDEX", None)
@@ -0,0 +1,119 @@
+import io
+import json
+import os
+import zipfile
+
+import pytest
+from fastapi.testclient import TestClient
+
+import app.main as main
+import app.verify as verify
+from app.batch_store import BatchStore
+from app.main import app
+from app.ocr import UnreadableLabelError
+
+def record(folder, overall, failing=()):
+    items = [{"field": f, "status": "FAIL" if f in failing else "PASS"} for f in ("brand_name", "abv", "net_contents")]
+    return {
+        "folder": folder,
+        "label_filename": "label.png",
+        "application": {"brand_name": "STONE'S THROW", "abv": "12.5%", "net_contents": "750 mL"},
+        "result": {"overall_status": overall, "items": items},
+    }
+
+@pytest.fixture
+def store(tmp_path):
+    s = BatchStore.create(root=str(tmp_path))
+    s.append(record("sample_01", "PASS"))
+    s.append(record("sample_02", "NEEDS_REVIEW", failing=("abv",)))
+    s.append(record("sample_03", "NEEDS_REVIEW", failing=("brand_name",)))
+    s.close()
+    return BatchStore.open(s.batch_id, root=str(tmp_path))
+
+def test_batch_store_pages_in_order(store):
+    assert store.meta()["status"] == "complete"
+    page = store.page(offset=0, limit=2)
+    assert page["total"] == 3
+    assert [r["folder"] for r in page["results"]] == ["sample_01", "sample_02"]
+    assert page["next_offset"] == 2
+    assert store.page(offset=2, limit=2)["next_offset"] is None
+
+def test_batch_store_filters(store):
+    assert store.page(status="PASS")["total"] == 1
+    page = store.page(failing_field="abv")
+    assert [r["folder"] for r in page["results"]] == ["sample_02"]
+
+def test_batch_store_csv_export(store):
+    lines = "".join(store.iter_csv(status="NEEDS_REVIEW")).strip().splitlines()
+    assert lines[0].startswith("index,folder,label_filename")
+    assert len(lines) == 3
+    assert "FAIL" in lines[2]
+
+def test_batch_store_rejects_unknown_ids(tmp_path):
+    with pytest.raises(KeyError):
+        BatchStore.open("../etc/passwd", root=str(tmp_path))
+    with pytest.raises(KeyError):
+        BatchStore.open("0" * 32, root=str(tmp_path))
+
+def test_batch_store_pages_by_seeking(store, monkeypatch):
+    # Pages come from the offset index; the record file is never parsed in full
+    monkeypatch.setattr(BatchStore, "iter_records", None)
+    assert [r["folder"] for r in store.page(offset=1, limit=1)["results"]] == ["sample_02"]
+    assert store.page(offset=5)["results"] == []
+
+def test_batch_store_indexes_older_batches(store):
+    os.remove(store.index_path)
+    reopened = BatchStore.open(store.batch_id, root=store.root)
+    assert [r["folder"] for r in reopened.page(failing_field="brand_name")["results"]] == ["sample_03"]
+
+def test_batch_store_csv_has_a_column_per_check(tmp_path):
+    s = BatchStore.create(root=str(tmp_path))
+    rec = record("sample_01", "NEEDS_REVIEW")
+    rec["result"]["items"].append({"field": "sulfites", "status": "MISSING"})
+    s.append(rec)
+    s.close()
+    header = next(s.iter_csv()).strip().split(",")
+    assert header[-4:] == ["brand_name_status", "abv_status", "net_contents_status", "sulfites_status"]
+
+def test_sweep_removes_expired_batches(store):
+    old = BatchStore.create(root=store.root)
+    old.close()
+    os.utime(old.path, (0, 0))
+    BatchStore.create(root=store.root).close()
+    assert not any(n.startswith(old.batch_id) for n in os.listdir(store.root))
+    assert os.path.exists(store.path)
+
+def pairs_zip(labels):
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w") as z:
+        for i, label in enumerate(labels):
+            z.writestr(f"sample_{i}/label.png", label)
+            z.writestr(f"sample_{i}/application.json", json.dumps({"brand_name": "STONE'S THROW"}))
+    return buf.getvalue()
+
+def test_batch_pairs_records_unreadable_labels(tmp_path, monkeypatch):
+    monkeypatch.setenv("BATCH_STORE_DIR", str(tmp_path))
+    monkeypatch.delenv("BATCH_BROKER", raising=False)
+    def fake_verify(label, app, progressive=False):
+        if label != b"ok":
+            raise UnreadableLabelError("Label is not a readable image or PDF")
+        return {"overall_status": "PASS", "items": []}
+    monkeypatch.setattr(verify, "verify_application_pair", fake_verify)
+    r = TestClient(app).post("/api/verify-batch-pairs", files={"zip_file": ("b.zip", pairs_zip([b"ok", b"not an image", b"ok"]))})
+    assert r.status_code == 200, r.text
+    results = [rec["result"] for rec in r.json()["results"]]
+    assert [res["overall_status"] for res in results] == ["PASS", "NEEDS_REVIEW", "PASS"]
+    assert "error" in results[1]
+    assert BatchStore.open(r.json()["batch_id"], root=str(tmp_path)).meta()["status"] == "complete"
+
+def test_batch_pairs_marks_aborted_batches_failed(tmp_path, monkeypatch):
+    monkeypatch.setenv("BATCH_STORE_DIR", str(tmp_path))
+    monkeypatch.delenv("BATCH_BROKER", raising=False)
+    monkeypatch.setattr(main, "_thumbnail_b64", lambda label: 1 / 0 if label == b"boom" else None)
+    monkeypatch.setattr(verify, "verify_application_pair", lambda label, app, progressive=False: {"overall_status": "PASS", "items": []})
+    client = TestClient(app, raise_server_exceptions=False)
+    r = client.post("/api/verify-batch-pairs", files={"zip_file": ("b.zip", pairs_zip([b"ok", b"boom"]))})
+    assert r.status_code == 500
+    (meta,) = [n for n in os.listdir(tmp_path) if n.endswith(".meta.json")]
+    stored = BatchStore.open(meta.split(".")[0], root=str(tmp_path)).meta()
+    assert (stored["status"], stored["count"]) == ("failed", 1)
@@ -0,0 +1,63 @@
+import app.brand_index as brand_index
+from app.brand_index import BrandIndex
+from app.compare import compare
+from app.extract import extract_fields
+from app.models import ApplicationFields, TextBox
+
+def tb(i, text, conf=0.95, bbox=(10,10,300,60)):
+    return TextBox(id=f"t{i}", text=text, conf=conf, bbox=list(bbox))
+
+def test_resolves_ocr_noise_to_registered_brand(tmp_path):
+    idx = BrandIndex(str(tmp_path / "brands.ndjson"))
+    for b in ["STONE'S THROW", "RIVER VALLEY", "OLD TOM DISTILLERY"]:
+        idx.register(b)
+    assert idx.resolve("Stone's Throw") == ("STONE'S THROW", 1.0)
+    brand, score = idx.resolve("STONES THR0W")  # 0/O confusion
+    assert brand == "STONE'S THROW" and score >= 0.85
+    assert idx.resolve("HANDCRAFTED WINE") == (None, 0.0)
+
+def test_weak_edit_match_falls_back_to_trigrams(tmp_path):
+    idx = BrandIndex(str(tmp_path / "brands.ndjson"))
+    idx.register("OLD TIM GUN")  # within edit distance but below the resolve score
+    idx.register("OLD TOM GIN CO")
+    assert idx.resolve("OLD TOM GIN")[0] == "OLD TOM GIN CO"
+
+def test_index_persists_incrementally(tmp_path):
+    path = str(tmp_path / "brands.ndjson")
+    idx = BrandIndex(path)
+    assert idx.register("RIVER VALLEY")
+    assert not idx.register("river valley")  # same normalized brand
+    reloaded = BrandIndex(path).load()
+    assert len(reloaded) == 1
+    assert reloaded.resolve("RIVER VALLEY")[0] == "RIVER VALLEY"
+
+def test_compare_flags_other_registered_brand(tmp_path):
+    idx = BrandIndex(str(tmp_path / "brands.ndjson"))
+    idx.register("RIVER VALLEY")
+    idx.register("STONE'S THROW")
+    app = ApplicationFields(brand_name="Stone's Throw", require_gov_warning=False)
+    ext = extract_fields([tb(1, "RIVER VALLEY")], image_w=1000, image_h=1500)
+    brand = compare(app, ext, brand_index=idx)[0]
+    assert brand.status != "PASS"
+    assert "registered brand 'RIVER VALLEY'" in brand.notes
+
+def test_resolve_does_not_wait_for_register(tmp_path, monkeypatch):
+    monkeypatch.setattr(brand_index, "REFRESH_S", 3600.0)
+    idx = BrandIndex(str(tmp_path / "brands.ndjson"))
+    idx.register("RIVER VALLEY")
+    with idx._lock:  # a register in progress elsewhere
+        assert idx.resolve("RIVER VALEY")[0] == "RIVER VALLEY"
+
+def test_nodes_sharing_a_file_see_each_others_brands(tmp_path, monkeypatch):
+    monkeypatch.setattr(brand_index, "REFRESH_S", 0.0)
+    path = str(tmp_path / "brands.ndjson")
+    a, b = BrandIndex(path).load(), BrandIndex(path).load()
+    a.register("RIVER VALLEY")
+    assert b.resolve("RIVER VALLEY")[0] == "RIVER VALLEY"
+    assert not b.register("River Valley")
+    assert len(BrandIndex(path).load()) == 1
+
+def test_default_path_is_under_data_dir(tmp_path, monkeypatch):
+    monkeypatch.delenv("BRAND_INDEX_PATH")
+    monkeypatch.setenv("DATA_DIR", str(tmp_path))
+    assert brand_index.get_brand_index().path == str(tmp_path / "brand_index.ndjson")
@@ -0,0 +1,53 @@
+import numpy as np
+
+import app.ocr as ocr
+from app.lang import detect_language, label_languages, routable
+import app.lang as lang
+from app.models import TextBox
+
+def tb(i, text):
+    return TextBox(id=f"p{i}", text=text, conf=0.9, bbox=[0, i * 100, 500, 80])
+
+def test_english_label_text_stays_english():
+    assert detect_language("Red Wine produced and bottled by Example Winery")[0] == "eng"
+    assert detect_language("GOVERNMENT WARNING: (1) According to the Surgeon General, women should not drink")[0] == "eng"
+
+def test_spanish_detected_without_accents():
+    # an English-only OCR pass drops accents; detection must still work
+    assert detect_language("Vino tinto embotellado por Bodega del Sur. Contenido neto 750 ml")[0] == "spa"
+    assert detect_language("Advertencia: las mujeres no deben consumir bebidas alcohólicas durante el embarazo")[0] == "spa"
+
+def test_single_hit_is_not_enough():
+    assert detect_language("VINO 750 mL")[0] == "eng"
+
+def test_bilingual_label_languages_ordered_by_coverage():
+    paras = [
+        tb(1, "STONE'S THROW Red Wine produced and bottled by Example Winery LLC, women should not drink during pregnancy"),
+        tb(2, "Vino tinto embotellado por Example Winery"),
+        tb(3, "750 mL"),
+    ]
+    assert label_languages(paras) == ["eng", "spa"]
+
+def test_routable_requires_installed_pack(monkeypatch):
+    monkeypatch.setattr(lang, "installed_languages", lambda: frozenset({"eng", "spa"}))
+    assert routable(["spa", "fra"], ["spa", "fra"]) == ["spa"]
+    assert routable(["spa"], ["fra"]) == []
+
+def test_short_and_shared_words_do_not_route():
+    # OCR noise and words common to several languages are not evidence
+    assert detect_language("e la del y di el con vino")[0] == "eng"
+
+def test_reocr_replaces_lines_in_the_padded_crop(monkeypatch):
+    first = [
+        ("STONE'S THROW", 90.0, [0, 0, 500, 40]),
+        ("Vino tinto embotellado por Bodega", 90.0, [0, 200, 500, 40]),
+        ("para contenido neto", 90.0, [0, 242, 500, 38]),
+        ("13.5% ABV", 90.0, [0, 272, 500, 22]),  # centre just below the paragraph, inside the margin
+    ]
+    reread = [(t + " (spa)", c, b) for t, c, b in first[1:]] + [("ST", 50.0, [0, 38, 40, 2])]
+    monkeypatch.setattr(lang, "installed_languages", lambda: frozenset({"eng", "spa"}))
+    monkeypatch.setattr(ocr, "_ocr_lines", lambda crop, l, y_offset=0, x_offset=0: reread)
+    monkeypatch.setattr(ocr, "paragraph_boxes", lambda boxes: [TextBox(id="p1", text=first[1][0] + " " + first[2][0], conf=0.9, bbox=[0, 200, 500, 80])])
+    lines, rerun = ocr._route_languages(np.zeros((400, 600), np.uint8), first, "eng", ["spa"])
+    assert rerun == 1
+    assert sorted(t for t, _, _ in lines) == sorted(["STONE'S THROW", "Vino tinto embotellado por Bodega (spa)", "para contenido neto (spa)", "13.5% ABV (spa)"])
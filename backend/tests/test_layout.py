@@ -0,0 +1,53 @@
+import numpy as np
+
+from app.layout import group_lines, reading_order_paragraphs, words_from_tesseract
+from app.models import TextBox
+
+def words(*specs):
+    boxes = np.array([s[:4] for s in specs], dtype=np.int64)
+    conf = np.array([s[4] for s in specs], dtype=np.float64)
+    return boxes, conf, [s[5] for s in specs]
+
+def tb(i, text, bbox):
+    return TextBox(id=f"l{i}", text=text, conf=0.9, bbox=list(bbox))
+
+def test_words_from_tesseract_skips_empty_and_missing_keys():
+    # page/block/par/line keys are not needed any more
+    data = {"text": ["", "750", "mL"], "conf": ["-1", "91", "88"], "left": [0, 10, 60], "top": [0, 5, 6], "width": [0, 40, 30], "height": [0, 20, 20]}
+    boxes, conf, texts = words_from_tesseract(data, y_offset=100)
+    assert texts == ["750", "mL"]
+    assert boxes[:, 1].tolist() == [105, 106]
+    assert conf.tolist() == [0.91, 0.88]
+
+def test_words_on_one_baseline_merge_but_columns_split():
+    boxes, conf, texts = words(
+        (10, 100, 60, 20, 0.9, "STONE'S"),
+        (80, 102, 60, 20, 0.9, "THROW"),
+        (600, 101, 50, 20, 0.9, "750"),
+        (660, 100, 30, 20, 0.9, "mL"),
+    )
+    lines = sorted(group_lines(boxes, conf, texts), key=lambda l: l[2][0])
+    assert [l[0] for l in lines] == ["STONE'S THROW", "750 mL"]
+    assert lines[0][2] == [10, 100, 130, 22]
+
+def test_low_confidence_noise_does_not_drag_line_center():
+    boxes, conf, texts = words(
+        (10, 100, 50, 20, 0.95, "GOVERNMENT"),
+        (70, 100, 50, 20, 0.95, "WARNING:"),
+        (130, 109, 20, 20, 0.0, "~"),   # speck near the baseline
+        (10, 124, 50, 20, 0.95, "(1)"),
+    )
+    lines = sorted(group_lines(boxes, conf, texts), key=lambda l: l[2][1])
+    assert lines[0][0] == "GOVERNMENT WARNING: ~"
+    assert lines[1][0] == "(1)"
+
+def test_reading_order_reads_columns_left_then_right():
+    lines = [
+        tb(1, "STONE'S THROW", (10, 10, 600, 60)),
+        tb(2, "GOVERNMENT WARNING: (1) According", (10, 200, 280, 20)),
+        tb(3, "to the Surgeon General, women", (10, 222, 280, 20)),
+        tb(4, "Nutrition facts", (320, 200, 280, 20)),
+        tb(5, "Serving size 5 fl oz", (320, 222, 280, 20)),
+    ]
+    paras = reading_order_paragraphs(lines)
+    assert [[l.id for l in p] for p in paras] == [["l1"], ["l2", "l3"], ["l4", "l5"]]
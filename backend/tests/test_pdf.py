@@ -0,0 +1,73 @@
+import subprocess
+
+import pytest
+from fastapi.testclient import TestClient
+
+import app.pdf as pdf
+from app.main import app
+from app.ocr import UnreadableLabelError
+from app.pdf import is_pdf, parse_bbox_layout
+
+BBOX_LAYOUT = """<?xml version="1.0" encoding="UTF-8"?>
+<html xmlns="http://www.w3.org/1999/xhtml">
+<head><title></title></head>
+<body>
+<doc>
+  <page width="288.000000" height="432.000000">
+    <flow>
+      <block xMin="36.0" yMin="300.0" xMax="250.0" yMax="312.0">
+        <line xMin="36.0" yMin="300.0" xMax="250.0" yMax="312.0">
+          <word xMin="36.0" yMin="300.0" xMax="120.0" yMax="312.0">GOVERNMENT</word>
+          <word xMin="124.0" yMin="300.0" xMax="190.0" yMax="312.0">WARNING:</word>
+        </line>
+      </block>
+      <block xMin="36.0" yMin="36.0" xMax="200.0" yMax="72.0">
+        <line xMin="36.0" yMin="36.0" xMax="200.0" yMax="72.0">
+          <word xMin="36.0" yMin="36.0" xMax="110.0" yMax="72.0">STONE'S</word>
+          <word xMin="116.0" yMin="36.0" xMax="200.0" yMax="72.0">THROW</word>
+        </line>
+      </block>
+    </flow>
+  </page>
+</doc>
+</body>
+</html>
+"""
+
+def test_is_pdf_sniffs_magic_bytes():
+    assert is_pdf(b"%PDF-1.7\n...")
+    assert not is_pdf(b"\x89PNG\r\n\x1a\n")
+
+def test_text_layer_becomes_sorted_line_boxes():
+    # 300 dpi: points * 300/72
+    boxes, size = parse_bbox_layout(BBOX_LAYOUT, scale=300 / 72.0)
+    assert size == (1200, 1800)
+    assert [b.text for b in boxes] == ["STONE'S THROW", "GOVERNMENT WARNING:"]
+    assert boxes[0].id == "l1" and boxes[0].conf == 1.0
+    assert boxes[0].bbox == [150, 150, 683, 150]
+
+def poppler_fails(cmd, **kwargs):
+    raise subprocess.CalledProcessError(1, cmd, stderr=b"Syntax Error: Couldn't read xref table\n")
+
+def test_unrenderable_pdf_is_unreadable_label(monkeypatch):
+    monkeypatch.setattr(pdf.subprocess, "run", poppler_fails)
+    with pytest.raises(UnreadableLabelError, match="xref"):
+        pdf.rasterize_pdf(b"%PDF-1.7 garbage")
+
+def test_undecodable_label_is_a_400(monkeypatch):
+    monkeypatch.setattr(pdf, "pdf_text_boxes", lambda data: None)
+    monkeypatch.setattr(pdf.subprocess, "run", poppler_fails)
+    client = TestClient(app)
+    for body in (b"%PDF-1.7 garbage", b"not an image"):
+        r = client.post("/api/verify", files={"file": ("label", body)}, data={"brand_name": "STONE'S THROW"})
+        assert r.status_code == 400, r.text
+
+def test_pdftotext_failures_are_a_400(monkeypatch):
+    client = TestClient(app)
+    for exc in (subprocess.TimeoutExpired(["pdftotext"], 30), FileNotFoundError("pdftotext")):
+        def run(cmd, exc=exc, **kwargs):
+            raise exc
+        monkeypatch.setattr(pdf.subprocess, "run", run)
+        assert pdf.pdf_text_boxes(b"%PDF-1.7 slow") is None
+        r = client.post("/api/verify", files={"file": ("label.pdf", b"%PDF-1.7 slow")}, data={"brand_name": "STONE'S THROW"})
+        assert r.status_code == 400, r.text
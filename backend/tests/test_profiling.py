@@ -0,0 +1,47 @@
+import os
+import time
+
+from app.profiling import RequestProfiler, load_profile, should_profile
+
+def busy_wait(seconds):
+    end = time.time() + seconds
+    while time.time() < end:
+        pass
+
+def profiled_request():
+    busy_wait(0.1)
+
+def test_disabled_profiler_captures_nothing():
+    with RequestProfiler(False) as prof:
+        profiled_request()
+    assert prof.profile_id is None
+
+def test_profile_is_stored_in_collapsed_stack_format(tmp_path, monkeypatch):
+    monkeypatch.setenv("PROFILE_DIR", str(tmp_path))
+    monkeypatch.setenv("PROFILE_INTERVAL_MS", "1")
+    with RequestProfiler(True) as prof:
+        profiled_request()
+    text = load_profile(prof.profile_id)
+    stack, count = text.splitlines()[0].rsplit(" ", 1)
+    # stacks start at the frame that entered the profiler
+    assert stack.startswith("test_profiling.py:test_profile_is_stored_in_collapsed_stack_format;")
+    assert "test_profiling.py:busy_wait" in stack
+    assert int(count) > 0
+
+def test_sampling_one_in_n(monkeypatch):
+    monkeypatch.setenv("PROFILE_SAMPLE_N", "3")
+    picks = [should_profile() for _ in range(9)]
+    assert sum(picks) == 3
+    monkeypatch.setenv("PROFILE_SAMPLE_N", "0")
+    assert not any(should_profile() for _ in range(5))
+    assert should_profile(requested=True)
+
+def test_old_profiles_are_swept(tmp_path, monkeypatch):
+    monkeypatch.setenv("PROFILE_DIR", str(tmp_path))
+    monkeypatch.setenv("PROFILE_INTERVAL_MS", "1")
+    with RequestProfiler(True) as old:
+        profiled_request()
+    os.utime(tmp_path / f"{old.profile_id}.collapsed", (0, 0))
+    with RequestProfiler(True) as new:
+        profiled_request()
+    assert [p.name for p in tmp_path.iterdir()] == [f"{new.profile_id}.collapsed"]
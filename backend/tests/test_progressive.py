@@ -0,0 +1,89 @@
+import numpy as np
+
+import app.ocr as ocr
+import app.progressive as progressive
+from app.extract import extract_fields
+from app.models import ApplicationFields, CheckItem, TextBox
+from app.ocr import ocr_regions
+from app.progressive import is_decided, overall_from_items, PROGRESSIVE_REGIONS
+
+def item(field, status):
+    return CheckItem(field=field, status=status)
+
+def test_all_pass_is_decided_early():
+    # Triage: a confident PASS after the top bands should skip the rest
+    items = [item("brand_name", "PASS"), item("abv", "PASS"), item("net_contents", "PASS")]
+    assert is_decided(items, brand_final=True)
+    assert overall_from_items(items) == "PASS"
+
+def test_missing_brand_is_decided_after_brand_band():
+    items = [item("brand_name", "MISSING"), item("abv", "MISSING"), item("government_warning", "FAIL")]
+    assert is_decided(items, brand_final=True)
+    assert not is_decided(items, brand_final=False)
+    assert overall_from_items(items) == "NEEDS_REVIEW"
+
+def test_pending_fields_keep_reading():
+    # Brand passes but the warning band has not been read yet
+    items = [item("brand_name", "PASS"), item("government_warning", "FAIL")]
+    assert not is_decided(items, brand_final=True)
+
+def test_regions_cover_label_top_to_bottom():
+    starts = [r[1] for r in PROGRESSIVE_REGIONS]
+    ends = [r[2] for r in PROGRESSIVE_REGIONS]
+    assert starts[0] == 0.0 and ends[-1] == 1.0
+    assert starts[1:] == ends[:-1]
+
+H = 1000
+
+def fake_page(monkeypatch, page):
+    """Serve OCR from (text, top, height) lines; lines cut by a crop come back clipped."""
+    def fake_ocr_lines(crop, lang, y_offset=0, x_offset=0):
+        bottom = y_offset + crop.shape[0]
+        out = []
+        for text, top, h in page:
+            t, b = max(top, y_offset), min(top + h, bottom)
+            if b > t:
+                out.append((text if (t, b) == (top, top + h) else text[: len(text) // 2], 90.0, [10, t, 300, b - t]))
+        return out
+    monkeypatch.setattr(ocr, "_ocr_lines", fake_ocr_lines)
+
+def test_ocr_regions_assigns_lines_by_top(monkeypatch):
+    # Top in the brand band, centre in the next band: still a brand-band line
+    fake_page(monkeypatch, [("STONE'S THROW", 370, 20), ("13.5% ABV", 500, 20), ("GOVERNMENT WARNING:", 800, 20)])
+    bands = list(ocr_regions(np.zeros((H, 800), np.uint8), PROGRESSIVE_REGIONS))
+    assert [b[0] for b in bands] == ["brand", "abv_net", "warning"]
+    assert [tb.text for tb in bands[0][1]] == ["STONE'S THROW"]
+    assert all(b[3] for b in bands)
+    assert [tb.text for tb in bands[-1][1]] == ["STONE'S THROW", "13.5% ABV", "GOVERNMENT WARNING:"]
+
+def test_ocr_regions_carries_lines_cut_by_the_crop(monkeypatch):
+    # Tall brand line running past the brand crop is read whole with the next band, once
+    fake_page(monkeypatch, [("STONE'S THROW", 380, 80), ("13.5% ABV", 500, 20)])
+    bands = list(ocr_regions(np.zeros((H, 800), np.uint8), PROGRESSIVE_REGIONS))
+    assert bands[0][1] == [] and not bands[0][3]
+    assert [tb.text for tb in bands[1][1]] == ["STONE'S THROW", "13.5% ABV"] and bands[1][3]
+
+def run_progressive(monkeypatch, page):
+    fake_page(monkeypatch, page)
+    monkeypatch.setattr(progressive, "binarize_label", lambda b: np.zeros((H, 800), np.uint8))
+    app = ApplicationFields(brand_name="Stone's Throw", abv="13.5%", require_gov_warning=False)
+    return progressive.verify_progressive(b"label", app)
+
+def test_verify_progressive_stops_after_brand_band(monkeypatch):
+    items, _, _, info = run_progressive(monkeypatch, [("OTHER BRAND", 100, 40), ("13.5% ABV", 500, 20)])
+    assert info == {"regions_read": ["brand"], "regions_skipped": ["abv_net", "warning"]}
+    assert overall_from_items(items) == "NEEDS_REVIEW"
+
+def test_verify_progressive_waits_for_cut_brand_line(monkeypatch):
+    items, _, _, info = run_progressive(monkeypatch, [("STONE'S THROW", 380, 80), ("13.5% ABV", 500, 20)])
+    assert info["regions_read"] == ["brand", "abv_net"]
+    assert overall_from_items(items) == "PASS"
+
+def test_brand_band_matches_brand_candidates(monkeypatch):
+    # Lines at the brand boundary, for heights where 0.4 * h is not a whole row
+    for h in (1000, 1001, 1003, 997):
+        page = [(f"L{top}", top, 5) for top in range(395, 406)]
+        fake_page(monkeypatch, page)
+        brand_band = next(ocr_regions(np.zeros((h, 800), np.uint8), PROGRESSIVE_REGIONS))[1]
+        candidates = extract_fields([TextBox(id=t, text=t, conf=90.0, bbox=[10, top, 300, 5]) for t, top, _ in page], image_w=800, image_h=h).brand_candidates
+        assert {tb.text for tb in brand_band} == {tb.text for tb in candidates}, h
@@ -0,0 +1,102 @@
+import json
+import re
+
+import pytest
+
+from app.extract import ABV_RE, NET_RE
+from app.models import ApplicationFields, TextBox
+from app.rules import DEFAULT_RULES_PATH, RuleSet, load_rule_specs
+
+def tb(i, text):
+    return TextBox(id=f"l{i}", text=text, conf=0.9, bbox=[10, i * 40, 300, 30])
+
+def by_field(items):
+    return {i.field: i for i in items}
+
+LINES = [
+    tb(1, "STONE'S THROW"),
+    tb(2, "Red Wine"),
+    tb(3, "12.5% ALC/VOL"),
+    tb(4, "750 mL"),
+    tb(5, "Bottled by Example Winery LLC, Napa, CA"),
+    tb(6, "Product of France"),
+    tb(7, "CONTAINS SULFITES"),
+]
+
+def test_bundled_abv_and_net_patterns_match_extract():
+    specs = {s["field"]: s for s in load_rule_specs(DEFAULT_RULES_PATH)}
+    assert specs["abv"]["line_pattern"] == ABV_RE.pattern
+    assert specs["net_contents"]["line_pattern"] == NET_RE.pattern
+
+OPT_IN = ["class_type", "producer", "country_of_origin", "sulfites"]
+
+def test_all_rules_evaluated_in_one_pass():
+    rules = RuleSet(load_rule_specs(DEFAULT_RULES_PATH), enable=OPT_IN)
+    app = ApplicationFields(brand_name="Stone's Throw", abv="12.5%", net_contents="750 mL", class_type="Red Wine",
+                            producer="Example Winery LLC", country_of_origin="France", contains_sulfites=True)
+    timings = {}
+    items = by_field(rules.evaluate(app, LINES, rule_timings_us=timings))
+    assert {f: i.status for f, i in items.items()} == {
+        "abv": "PASS", "net_contents": "PASS", "class_type": "PASS",
+        "producer": "PASS", "country_of_origin": "PASS", "sulfites": "PASS",
+    }
+    assert items["producer"].bbox_ids == ["l5"]
+    assert items["country_of_origin"].bbox_ids == ["l6"]
+    assert set(timings) == set(items)
+
+def test_rules_without_application_values_are_skipped():
+    rules = RuleSet(load_rule_specs(DEFAULT_RULES_PATH))
+    items = rules.evaluate(ApplicationFields(brand_name="X", contains_sulfites=False), LINES)
+    assert items == []
+
+def test_new_field_checks_are_opt_in():
+    # Paired-dataset applications carry designation/producer that labels do not print
+    app = ApplicationFields.from_application_json({"brand_name": "STONE'S THROW", "abv": "12.5%", "net_contents": "750 mL",
+                                                   "designation": "Red Wine", "producer": "Example Winery LLC"})
+    items = RuleSet(load_rule_specs(DEFAULT_RULES_PATH)).evaluate(app, LINES)
+    assert [i.field for i in items] == ["abv", "net_contents"]
+
+def test_fragment_lines_do_not_match_longer_expected_values():
+    rules = RuleSet(load_rule_specs(DEFAULT_RULES_PATH), enable=OPT_IN)
+    items = by_field(rules.evaluate(ApplicationFields(brand_name="X", producer="Example Winery LLC"), [tb(1, "LLC")]))
+    assert items["producer"].status == "FAIL"
+
+def test_missing_candidates_and_per_rule_thresholds(tmp_path):
+    path = tmp_path / "rules.json"
+    path.write_text(json.dumps({"rules": [
+        {"field": "country_of_origin", "line_pattern": "product of", "ignore_case": True,
+         "score": "contains", "pass": 0.99, "review": 0.5},
+    ]}))
+    rules = RuleSet(load_rule_specs(str(path)))
+    app = ApplicationFields(brand_name="X", country_of_origin="Italy")
+    assert rules.evaluate(app, [tb(1, "Italy")])[0].status == "MISSING"
+    assert rules.evaluate(app, [tb(1, "PRODUCT OF ITALI")])[0].status == "REVIEW"
+
+def test_invalid_rules_fail_at_compile_time():
+    with pytest.raises(ValueError, match="abv"):
+        RuleSet([{"field": "abv", "line_pattern": "(", "pass": 0.9, "review": 0.8}])
+    with pytest.raises(ValueError, match="unknown application fields"):
+        RuleSet([{"field": "vintage", "pass": 0.9, "review": 0.8}])
+
+@pytest.mark.parametrize("pattern, error", [
+    (r"(?i)sulfites", "inline global flags"),
+    (r"(\d+)\s*x\s*\1", "numbered backreferences"),
+    (r"(?P<num>\d+)", "already used"),
+])
+def test_patterns_that_break_the_combined_matcher_name_their_rule(pattern, error):
+    specs = [
+        {"field": "abv", "line_pattern": r"(?P<num>\d+)%", "pass": 0.9, "review": 0.8},
+        {"field": "net_contents", "line_pattern": pattern, "pass": 0.9, "review": 0.8},
+    ]
+    with pytest.raises(ValueError, match=f"Invalid rule net_contents: .*{error}"):
+        RuleSet(specs)
+
+def test_combined_matcher_agrees_with_separate_searches():
+    # Rules whose matches start at the same position must all be found
+    specs = [{"field": f, "line_pattern": p, "ignore_case": True, "pass": 0.9, "review": 0.8}
+             for f, p in [("abv", r"\d+\s*%"), ("net_contents", r"\d+\s*ml"), ("country_of_origin", r"\d")]]
+    rules = RuleSet(specs)
+    wanted = {r.group for r in rules.rules}
+    for text in ["12% 750 ML", "750 mL", "abc", "7", "12.5%"]:
+        expected = {r.group for r, spec in zip(rules.rules, specs) if re.search(spec["line_pattern"], text, re.I)}
+        assert rules._matching_groups(text, wanted) == expected, text
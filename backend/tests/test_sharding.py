@@ -0,0 +1,78 @@
+import threading
+import time
+
+from app.sharding import FilesystemBroker, InProcessBroker, run_sharded, run_worker
+
+def fake_verify(label_bytes, app_data, progressive=False):
+    return {"overall_status": "PASS", "items": [], "label": label_bytes.decode(), "brand": app_data["brand_name"]}
+
+def pairs(n):
+    return [(f"sample_{i:02d}", "label.png", f"img{i}".encode(), {"brand_name": f"B{i}"}) for i in range(n)]
+
+def start_workers(broker, n=2):
+    stop = threading.Event()
+    threads = [threading.Thread(target=run_worker, args=(broker, f"w{i}", stop, fake_verify), daemon=True) for i in range(n)]
+    for t in threads:
+        t.start()
+    return stop
+
+def test_inprocess_shards_merge_in_order():
+    broker = InProcessBroker()
+    stop = start_workers(broker, n=3)
+    try:
+        out = list(run_sharded(pairs(10), broker, shard_size=3))
+    finally:
+        stop.set()
+    assert [o[0] for o in out] == [p[0] for p in pairs(10)]
+    assert [o[4]["label"] for o in out] == [f"img{i}" for i in range(10)]
+    assert not (broker._open or broker._claimed or broker._results)
+
+def test_filesystem_broker_retries_lost_worker(tmp_path):
+    broker = FilesystemBroker(str(tmp_path))
+    stop = threading.Event()
+
+    def dead_then_live():
+        # The first shard is claimed by a worker that dies without completing it;
+        # its lease expires and the coordinator requeues it.
+        while broker.claim_task("dead", timeout=1.0) is None:
+            pass
+        run_worker(broker, "live", stop, fake_verify)
+
+    threading.Thread(target=dead_then_live, daemon=True).start()
+    try:
+        out = list(run_sharded(pairs(4), broker, shard_size=2, lease_s=0.2, poll_s=0.02))
+    finally:
+        stop.set()
+    assert [o[4]["brand"] for o in out] == ["B0", "B1", "B2", "B3"]
+    assert not any(list((tmp_path / d).iterdir()) for d in ("pending", "claimed", "results"))
+
+def test_retries_exhausted_reports_errors():
+    broker = InProcessBroker()
+
+    def always_dies():
+        while True:
+            broker.claim_task("dead", timeout=1.0)
+
+    threading.Thread(target=always_dies, daemon=True).start()
+    out = list(run_sharded(pairs(2), broker, shard_size=2, lease_s=0.05, max_attempts=2, poll_s=0.02))
+    assert [o[4]["overall_status"] for o in out] == ["NEEDS_REVIEW", "NEEDS_REVIEW"]
+    assert "retries exhausted" in out[0][4]["error"]
+
+def test_requeue_only_touches_own_batch(tmp_path):
+    for broker in (InProcessBroker(), FilesystemBroker(str(tmp_path))):
+        broker.put_task({"task_id": "aaa-000000", "items": []})
+        broker.put_task({"task_id": "bbb-000000", "items": []})
+        assert broker.claim_task("w", timeout=1.0) and broker.claim_task("w", timeout=1.0)
+        time.sleep(0.02)
+        assert [t["task_id"] for t in broker.requeue_expired(0.01, prefix="bbb-")] == ["bbb-000000"]
+
+def test_late_duplicate_completion_leaves_no_result(tmp_path):
+    for broker in (InProcessBroker(), FilesystemBroker(str(tmp_path))):
+        broker.put_task({"task_id": "t-000000", "items": []})
+        broker.claim_task("slow", timeout=1.0)
+        broker.complete_task("t-000000", {"results": ["first"]})
+        assert broker.pop_result("t-000000") == {"results": ["first"]}
+        broker.complete_task("t-000000", {"results": ["late"]})
+        assert broker.pop_result("t-000000") is None
+    assert not any(list((tmp_path / d).iterdir()) for d in ("pending", "claimed", "results"))
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["claimed", "pending", "results"]
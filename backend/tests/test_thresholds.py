@@ -0,0 +1,43 @@
+import json
+
+import app.thresholds as thresholds
+from app.compare import _gov_warning_strict_status, compare, warning_scores
+from app.extract import extract_fields
+from app.models import ApplicationFields, TextBox
+from app.rules import DEFAULT_RULES_PATH, RuleSet, load_rule_specs
+from app.thresholds import DEFAULT_THRESHOLDS, load_thresholds
+
+def tb(i, text, bbox=(10, 10, 300, 60)):
+    return TextBox(id=f"t{i}", text=text, conf=0.95, bbox=list(bbox))
+
+def test_overrides_merge_over_defaults(tmp_path):
+    path = tmp_path / "thresholds.json"
+    path.write_text(json.dumps({"brand_name": {"pass": 0.9}, "abv": {"pass": 0.97, "review": 0.85}}))
+    th = load_thresholds(str(path))
+    assert th["brand_name"] == {"pass": 0.9, "review": DEFAULT_THRESHOLDS["brand_name"]["review"]}
+    assert th["government_warning"] == DEFAULT_THRESHOLDS["government_warning"]
+    assert th["abv"] == {"pass": 0.97, "review": 0.85}
+    assert load_thresholds(None) == DEFAULT_THRESHOLDS
+
+def test_rule_thresholds_are_overridden_by_field():
+    rules = RuleSet(load_rule_specs(DEFAULT_RULES_PATH)).with_thresholds({"abv": {"pass": 0.5}})
+    abv = next(r for r in rules.rules if r.field == "abv")
+    assert (abv.pass_th, abv.review_th) == (0.5, 0.80)
+
+def test_brand_threshold_comes_from_config(monkeypatch):
+    app = ApplicationFields(brand_name="Stone's Throw", require_gov_warning=False)
+    ext = extract_fields([tb(1, "STONES THR0W")], image_w=1000, image_h=1500)
+    score = compare(app, ext)[0].confidence
+    monkeypatch.setattr(thresholds, "_THRESHOLDS", {**DEFAULT_THRESHOLDS, "brand_name": {"pass": score - 0.01, "review": 0.5}})
+    assert compare(app, ext)[0].status == "PASS"
+    monkeypatch.setattr(thresholds, "_THRESHOLDS", {**DEFAULT_THRESHOLDS, "brand_name": {"pass": score + 0.01, "review": 0.5}})
+    assert compare(app, ext)[0].status == "REVIEW"
+
+def test_warning_scores_expose_raw_evidence(monkeypatch):
+    assert warning_scores("750 mL") is None
+    text = "GOVERNMENT WARNING (1) According to the Surgeon General women should not drink"
+    scores = warning_scores(text)
+    assert scores["header_present"] and not scores["header_ok"]
+    assert scores["clause1"] > 0.8 > scores["clause2"]
+    monkeypatch.setattr(thresholds, "_THRESHOLDS", {**DEFAULT_THRESHOLDS, "government_warning": {"clause": 0.92, "full": 0.88, "review": 0.99}})
+    assert _gov_warning_strict_status(text)[0] == "FAIL"
@@ -0,0 +1,39 @@
+import io
+
+import numpy as np
+from PIL import Image
+
+from app.ocr import binarize_label, upload_capabilities
+
+def encode(img, fmt="PNG"):
+    buf = io.BytesIO()
+    img.save(buf, format=fmt)
+    return buf.getvalue()
+
+def label_gray():
+    rng = np.random.default_rng(0)
+    arr = np.full((120, 200), 225, dtype=np.uint8)
+    arr[40:60, 20:180] = 30  # a dark "text" bar
+    return np.clip(arr + rng.integers(-15, 15, arr.shape), 0, 255).astype(np.uint8)
+
+def test_grayscale_upload_binarizes_like_rgb():
+    gray = label_gray()
+    from_rgb = binarize_label(encode(Image.fromarray(gray).convert("RGB")))
+    from_l = binarize_label(encode(Image.fromarray(gray)))
+    assert np.array_equal(from_rgb, from_l)
+
+def test_one_bit_upload_is_used_as_is():
+    bits = label_gray() > 128
+    out = binarize_label(encode(Image.fromarray(bits)))
+    assert out.dtype == np.uint8
+    assert np.array_equal(out, np.where(bits, 255, 0))
+
+def test_compact_uploads_still_respect_pixel_budget():
+    img = Image.fromarray(label_gray() > 128)
+    assert binarize_label(encode(img), max_pixels=6000).size <= 6000
+
+def test_capabilities_advertise_budget(monkeypatch):
+    monkeypatch.setenv("MAX_IMAGE_PIXELS", "1234567")
+    caps = upload_capabilities()
+    assert caps["max_image_pixels"] == 1234567
+    assert "png-1bit" in caps["compact_formats"]
@@ -0,0 +1,24 @@
+from fastapi.testclient import TestClient
+
+import app.verify as verify
+from app.main import app
+from app.models import ApplicationFields, TextBox
+
+LINES = [
+    TextBox(id="l1", text="STONE'S THROW", conf=95.0, bbox=[10, 20, 300, 60]),
+    TextBox(id="l2", text="13.5% ALC/VOL", conf=95.0, bbox=[10, 500, 200, 20]),
+]
+
+def test_api_and_batch_share_one_pipeline(monkeypatch):
+    monkeypatch.setattr(verify, "label_boxes", lambda data, stats=None: (LINES, {"ocr_ms": 1}, (400, 1000)))
+    r = TestClient(app).post("/api/verify", files={"file": ("label.png", b"png")},
+                             data={"brand_name": "STONE'S THROW", "abv": "13.5%", "require_gov_warning": "false", "debug": "true"})
+    assert r.status_code == 200, r.text
+    api = r.json()
+    assert api["overall_status"] == "PASS" and api["debug"] == {"num_boxes": 2}
+
+    app_fields = ApplicationFields(brand_name="STONE'S THROW", abv="13.5%", require_gov_warning=False)
+    out = verify.verify_label_fields(b"png", app_fields)
+    assert out["overall_status"] == api["overall_status"]
+    assert out["items"] == api["items"]
+    assert "debug" not in out and "progressive" not in out
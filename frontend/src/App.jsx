@@ -1,5 +1,5 @@
 import React, { useEffect, useMemo, useState } from "react";
-import { verifySingle, verifyWithApplicationJson, verifyBatchPairs } from "./api";
+import { verifySingle, verifyWithApplicationJson, verifyBatchPairs, fetchBatchResults, batchExportUrl } from "./api";
 
 const STATUS_META = {
   PASS: { label: "Pass", tone: "pass" },
@@ -141,6 +141,26 @@ export default function App() {
     }
   }
 
+  async function loadMoreBatch() {
+    if (!batchResult?.batch_id || batchResult?.next_offset == null) return;
+
+    setLoading(true);
+    setError("");
+
+    try {
+      const page = await fetchBatchResults({ batchId: batchResult.batch_id, offset: batchResult.next_offset });
+      setBatchResult((prev) => ({
+        ...prev,
+        results: [...(prev?.results || []), ...(page.results || [])],
+        next_offset: page.next_offset,
+      }));
+    } catch (e) {
+      setError(String(e?.message || e));
+    } finally {
+      setLoading(false);
+    }
+  }
+
   const checks = useMemo(() => {
     const items = singleResult?.items || singleResult?.checks || singleResult?.results || [];
     return (Array.isArray(items) ? items : []).map((x) => ({
@@ -154,6 +174,13 @@ export default function App() {
   const checkNet = pickItem(checks, "net_contents");
   const checkWarn = pickItem(checks, "government_warning");
   const checkImg = pickItem(checks, "image_quality");
+  // Rule-engine checks only appear when the application supplies a value.
+  const extraChecks = [
+    ["Class/type designation", pickItem(checks, "class_type")],
+    ["Bottler/producer", pickItem(checks, "producer")],
+    ["Country of origin", pickItem(checks, "country_of_origin")],
+    ["Sulfite declaration", pickItem(checks, "sulfites")],
+  ].filter(([, item]) => item);
 
   return (
     <div className="page">
@@ -206,7 +233,7 @@ export default function App() {
                 <label className="fileDrop">
                   <input
                     type="file"
-                    accept=".png,.jpg,.jpeg"
+                    accept=".png,.jpg,.jpeg,.webp,.pdf"
                     onChange={(e) => onSelectLabelFile(e.target.files?.[0] || null)}
                   />
                   <div className="fileDropInner">
@@ -350,6 +377,9 @@ export default function App() {
                       <ChecklistRow title="Brand name" item={checkBrand} />
                       <ChecklistRow title="ABV" item={checkAbv} />
                       <ChecklistRow title="Net contents" item={checkNet} />
+                      {extraChecks.map(([title, item]) => (
+                        <ChecklistRow key={title} title={title} item={item} />
+                      ))}
                       <ChecklistRow title="Government warning (full text)" item={checkWarn} />
                       <ChecklistRow title="Image quality" item={checkImg} />
                     </div>
@@ -383,10 +413,22 @@ export default function App() {
                   <>
                     <div className="hint" style={{ marginBottom: 10 }}>
                       Processed: <b>{batchResult?.count ?? (batchResult?.results?.length || "—")}</b>
+                      {batchResult?.batch_id ? (
+                        <>
+                          {" "}•{" "}
+                          <a href={batchExportUrl({ batchId: batchResult.batch_id })}>Export CSV</a>
+                        </>
+                      ) : null}
                     </div>
 
                     <BatchTable data={batchResult} />
 
+                    {batchResult?.next_offset != null ? (
+                      <button className="primaryBtn" onClick={loadMoreBatch} disabled={loading} type="button" style={{ marginTop: 10 }}>
+                        {loading ? "Loading…" : "Load more results"}
+                      </button>
+                    ) : null}
+
                     <div className="divider" />
 
                     <details className="details">
@@ -471,7 +513,7 @@ function BatchTable({ data }) {
           </tr>
         </thead>
         <tbody>
-          {rows.slice(0, 300).map((r, idx) => {
+          {rows.map((r, idx) => {
             const res = r.result || {};
             const items = res.items || res.checks || res.results || [];
             const checks = (Array.isArray(items) ? items : []).map((x) => ({ ...x, field: x.field || x.name }));
@@ -481,6 +523,8 @@ function BatchTable({ data }) {
             const net = checks.find((x) => x.field === "net_contents");
             const warn = checks.find((x) => x.field === "government_warning");
             const imgq = checks.find((x) => x.field === "image_quality");
+            const shown = ["brand_name", "abv", "net_contents", "government_warning", "image_quality"];
+            const others = checks.filter((x) => !shown.includes(x.field));
 
             const overall = res.overall_status || res.overall || "—";
             const app = r.application || {};
@@ -533,6 +577,12 @@ function BatchTable({ data }) {
                     Brand: {brand?.status || "—"} • ABV: {abv?.status || "—"} • Net: {net?.status || "—"}
                     <br />
                     Warning: {warn?.status || "—"}
+                    {others.length > 0 && (
+                      <>
+                        <br />
+                        {others.map((x) => `${x.field}: ${x.status}`).join(" • ")}
+                      </>
+                    )}
                   </div>
                 </td>
               </tr>
@@ -540,12 +590,6 @@ function BatchTable({ data }) {
           })}
         </tbody>
       </table>
-
-      {rows.length > 300 ? (
-        <div className="hint" style={{ marginTop: 8 }}>
-          Showing first 300 results.
-        </div>
-      ) : null}
     </div>
   );
 }
@@ -1,10 +1,12 @@
+import { compactLabel, compactZip } from "./compact";
+
 // Use relative paths so the same build works locally and in GitHub Codespaces.
 // Vite dev server proxies /api -> http://backend:8000 (see vite.config.js).
 const API_BASE = "";
 
 export async function verifySingle({ file, brand_name, abv, net_contents, require_gov_warning }) {
   const form = new FormData();
-  form.append("file", file);
+  form.append("file", await compactLabel(file));
   form.append("brand_name", brand_name);
   if (abv) form.append("abv", abv);
   if (net_contents) form.append("net_contents", net_contents);
@@ -17,7 +19,7 @@ export async function verifySingle({ file, brand_name, abv, net_contents, requir
 
 export async function verifyWithApplicationJson({ file, applicationJsonFile }) {
   const form = new FormData();
-  form.append("file", file);
+  form.append("file", await compactLabel(file));
   form.append("application_json", applicationJsonFile);
 
   const res = await fetch(`${API_BASE}/api/verify-with-application-json`, { method: "POST", body: form });
@@ -27,7 +29,7 @@ export async function verifyWithApplicationJson({ file, applicationJsonFile }) {
 
 export async function verifyBatch({ zipFile, brand_name, abv, net_contents, require_gov_warning }) {
   const form = new FormData();
-  form.append("zip_file", zipFile);
+  form.append("zip_file", await compactZip(zipFile));
   form.append("brand_name", brand_name);
   if (abv) form.append("abv", abv);
   if (net_contents) form.append("net_contents", net_contents);
@@ -41,8 +43,25 @@ export async function verifyBatch({ zipFile, brand_name, abv, net_contents, requ
 
 export async function verifyBatchPairs({ zipFile }) {
   const form = new FormData();
-  form.append("zip_file", zipFile);
+  form.append("zip_file", await compactZip(zipFile));
   const res = await fetch(`/api/verify-batch-pairs`, { method: "POST", body: form });
   if (!res.ok) throw new Error(`API error: ${res.status}`);
   return await res.json();
 }
+
+export async function fetchBatchResults({ batchId, offset = 0, limit = 100, status, failingField }) {
+  const params = new URLSearchParams({ offset: String(offset), limit: String(limit) });
+  if (status) params.set("status", status);
+  if (failingField) params.set("failing_field", failingField);
+  const res = await fetch(`${API_BASE}/api/batches/${batchId}/results?${params}`);
+  if (!res.ok) throw new Error(`API error: ${res.status}`);
+  return await res.json();
+}
+
+export function batchExportUrl({ batchId, status, failingField }) {
+  const params = new URLSearchParams();
+  if (status) params.set("status", status);
+  if (failingField) params.set("failing_field", failingField);
+  const qs = params.toString();
+  return `${API_BASE}/api/batches/${batchId}/export.csv${qs ? `?${qs}` : ""}`;
+}
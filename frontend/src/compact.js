@@ -0,0 +1,192 @@
+// Shrink label images in the browser before upload.
+//
+// The backend downscales every label to its pixel budget and Otsu-binarizes
+// it before OCR, so full-resolution phone photos are mostly wasted upload
+// bandwidth and decode time. We do the same steps here (downscale, grayscale,
+// Otsu) and send a 1-bit PNG, or a grayscale WebP if the browser cannot
+// compress PNGs. GET /api/capabilities says what the backend accepts.
+
+const IMAGE_RE = /\.(png|jpe?g|webp)$/i; // what the backend accepts
+
+let capabilitiesPromise = null;
+
+export function getCapabilities() {
+  if (!capabilitiesPromise) {
+    capabilitiesPromise = fetch("/api/capabilities")
+      .then((res) => (res.ok ? res.json() : null))
+      .catch(() => null);
+  }
+  return capabilitiesPromise;
+}
+
+function renameExt(name, ext) {
+  return name.replace(/\.[^./]+$/, "") + ext;
+}
+
+// Same luma weights as the backend (cv2.COLOR_BGR2GRAY).
+function toGray(rgba) {
+  const gray = new Uint8Array(rgba.length / 4);
+  for (let i = 0, j = 0; j < gray.length; i += 4, j++) {
+    gray[j] = Math.round(0.299 * rgba[i] + 0.587 * rgba[i + 1] + 0.114 * rgba[i + 2]);
+  }
+  return gray;
+}
+
+// Otsu threshold; pixels > t become white, like cv2.THRESH_BINARY + THRESH_OTSU.
+function otsuThreshold(gray) {
+  const hist = new Float64Array(256);
+  for (let i = 0; i < gray.length; i++) hist[gray[i]]++;
+  let sumAll = 0;
+  for (let t = 0; t < 256; t++) sumAll += t * hist[t];
+
+  let wB = 0, sumB = 0, best = 0, bestVar = -1;
+  for (let t = 0; t < 256; t++) {
+    wB += hist[t];
+    if (wB === 0) continue;
+    const wF = gray.length - wB;
+    if (wF === 0) break;
+    sumB += t * hist[t];
+    const diff = sumB / wB - (sumAll - sumB) / wF;
+    const between = wB * wF * diff * diff;
+    if (between > bestVar) {
+      bestVar = between;
+      best = t;
+    }
+  }
+  return best;
+}
+
+const CRC_TABLE = (() => {
+  const table = new Uint32Array(256);
+  for (let n = 0; n < 256; n++) {
+    let c = n;
+    for (let k = 0; k < 8; k++) c = c & 1 ? 0xedb88320 ^ (c >>> 1) : c >>> 1;
+    table[n] = c >>> 0;
+  }
+  return table;
+})();
+
+function crc32(bytes) {
+  let c = 0xffffffff;
+  for (let i = 0; i < bytes.length; i++) c = CRC_TABLE[(c ^ bytes[i]) & 0xff] ^ (c >>> 8);
+  return (c ^ 0xffffffff) >>> 0;
+}
+
+function pngChunk(type, data) {
+  const out = new Uint8Array(12 + data.length);
+  const view = new DataView(out.buffer);
+  view.setUint32(0, data.length);
+  for (let i = 0; i < 4; i++) out[4 + i] = type.charCodeAt(i);
+  out.set(data, 8);
+  view.setUint32(8 + data.length, crc32(out.subarray(4, 8 + data.length)));
+  return out;
+}
+
+async function zlibDeflate(bytes) {
+  const stream = new Blob([bytes]).stream().pipeThrough(new CompressionStream("deflate"));
+  return new Uint8Array(await new Response(stream).arrayBuffer());
+}
+
+async function encodeOneBitPng(gray, width, height) {
+  const threshold = otsuThreshold(gray);
+  const stride = Math.ceil(width / 8);
+  const raw = new Uint8Array((stride + 1) * height); // each row: filter byte 0 + packed bits
+  for (let y = 0; y < height; y++) {
+    const row = y * (stride + 1) + 1;
+    for (let x = 0; x < width; x++) {
+      if (gray[y * width + x] > threshold) raw[row + (x >> 3)] |= 0x80 >> (x & 7);
+    }
+  }
+
+  const ihdr = new Uint8Array(13);
+  const view = new DataView(ihdr.buffer);
+  view.setUint32(0, width);
+  view.setUint32(4, height);
+  ihdr[8] = 1; // bit depth
+  ihdr[9] = 0; // grayscale
+  const signature = new Uint8Array([137, 80, 78, 71, 13, 10, 26, 10]);
+  return new Blob(
+    [signature, pngChunk("IHDR", ihdr), pngChunk("IDAT", await zlibDeflate(raw)), pngChunk("IEND", new Uint8Array(0))],
+    { type: "image/png" }
+  );
+}
+
+function canvasToBlob(canvas, type, quality) {
+  return new Promise((resolve) => canvas.toBlob(resolve, type, quality));
+}
+
+// Returns a smaller File for image labels, or the original file when it is
+// not an image (PDFs keep their text layer), compaction is unavailable, or
+// the result would not be smaller.
+export async function compactLabel(file, name = file.name) {
+  if (!IMAGE_RE.test(name) || typeof createImageBitmap !== "function") return file;
+  const caps = await getCapabilities();
+  if (!caps) return file;
+
+  let bitmap;
+  try {
+    bitmap = await createImageBitmap(file);
+  } catch {
+    return file;
+  }
+  const scale = Math.min(1, Math.sqrt(caps.max_image_pixels / (bitmap.width * bitmap.height)));
+  const width = Math.max(1, Math.floor(bitmap.width * scale));
+  const height = Math.max(1, Math.floor(bitmap.height * scale));
+
+  const canvas = document.createElement("canvas");
+  canvas.width = width;
+  canvas.height = height;
+  const ctx = canvas.getContext("2d", { willReadFrequently: true });
+  ctx.drawImage(bitmap, 0, 0, width, height);
+  bitmap.close();
+  const gray = toGray(ctx.getImageData(0, 0, width, height).data);
+
+  let blob = null;
+  let ext = null;
+  if (caps.compact_formats.includes("png-1bit") && typeof CompressionStream === "function") {
+    blob = await encodeOneBitPng(gray, width, height);
+    ext = ".png";
+  } else if (caps.compact_formats.includes("webp-gray")) {
+    const img = ctx.createImageData(width, height);
+    for (let j = 0, i = 0; j < gray.length; j++, i += 4) {
+      img.data[i] = img.data[i + 1] = img.data[i + 2] = gray[j];
+      img.data[i + 3] = 255;
+    }
+    ctx.putImageData(img, 0, 0);
+    blob = await canvasToBlob(canvas, "image/webp", 0.9);
+    ext = ".webp";
+    if (blob && blob.type !== "image/webp") blob = null; // browser fell back to PNG
+  }
+
+  if (!blob || blob.size >= file.size) return file;
+  return new File([blob], renameExt(name, ext), { type: blob.type });
+}
+
+// Rewrite a batch ZIP with every label image compacted; other entries
+// (application.json, PDFs) are copied unchanged.
+export async function compactZip(zipFile) {
+  const caps = await getCapabilities();
+  if (!caps) return zipFile;
+  const { default: JSZip } = await import("jszip");
+
+  const src = await JSZip.loadAsync(zipFile);
+  const out = new JSZip();
+  let changed = false;
+  for (const entry of Object.values(src.files)) {
+    if (entry.dir) continue;
+    const base = entry.name.split("/").pop();
+    if (base.startsWith(".") || entry.name.startsWith("__MACOSX/") || !IMAGE_RE.test(base)) {
+      out.file(entry.name, await entry.async("uint8array"));
+      continue;
+    }
+    const original = new File([await entry.async("blob")], base);
+    const compacted = await compactLabel(original, base);
+    const dir = entry.name.slice(0, entry.name.length - base.length);
+    out.file(dir + compacted.name, compacted);
+    changed = changed || compacted !== original;
+  }
+  if (!changed) return zipFile;
+  // Images are already compressed, so store rather than deflate them again.
+  const blob = await out.generateAsync({ type: "blob", compression: "STORE" });
+  return new File([blob], zipFile.name, { type: "application/zip" });
+}
@@ -0,0 +1,234 @@
+"""Procedurally render synthetic label images with known ground truth.
+
+Writes a dataset in the same layout as sample_data/cola_paired_dataset:
+
+  <out>/synthetic/sample_00001/label.png
+  <out>/synthetic/sample_00001/application.json
+  <out>/index.json
+
+Each index row also carries a "ground_truth" block describing what was
+rendered (mismatched fields, warning state, distortions) and the status a
+perfect reader should return ("expected_status").
+
+Example:
+  python scripts/gen_synthetic_labels.py --out /tmp/synth --count 2000 --seed 7
+"""
+
+import argparse
+import glob
+import json
+import random
+from pathlib import Path
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageEnhance, ImageFilter, ImageFont
+
+BRAND_WORDS_A = ["STONE'S", "RIVER", "OLD", "GOLDEN", "SILVER", "RED", "NORTH", "HIDDEN", "WILD", "IRON", "CEDAR", "BLUE"]
+BRAND_WORDS_B = ["THROW", "VALLEY", "OAK", "HARBOR", "RIDGE", "CREEK", "FOX", "MILL", "HOLLOW", "CROWN", "GATE", "ROCK"]
+CLASS_TYPES = [("Wine", "Red Wine"), ("Wine", "White Wine"), ("Malt Beverage", "India Pale Ale"), ("Distilled Spirits", "Straight Bourbon Whiskey"), ("Distilled Spirits", "Vodka")]
+NET_CONTENTS = ["750 mL", "375 mL", "1 L", "355 mL", "12 fl oz", "1.75 L"]
+PRODUCERS = ["Example Winery LLC", "Cedar Ridge Brewing Co.", "North Fork Distilling", "Hidden Creek Cellars"]
+
+WARNING_TEXT = (
+    "GOVERNMENT WARNING: (1) According to the Surgeon General, women should not drink alcoholic beverages "
+    "during pregnancy because of the risk of birth defects. (2) Consumption of alcoholic beverages impairs "
+    "your ability to drive a car or operate machinery, and may cause health problems."
+)
+
+DISTORTIONS = ["angle", "rotate", "blur", "noise", "dark", "glare"]
+
+
+def find_fonts(font_dir=None):
+    patterns = [f"{font_dir}/**/*.ttf"] if font_dir else []
+    patterns += ["/usr/share/fonts/**/*.ttf", "/Library/Fonts/*.ttf", "C:/Windows/Fonts/*.ttf"]
+    fonts = []
+    for p in patterns:
+        fonts.extend(glob.glob(p, recursive=True))
+    return sorted(set(fonts))
+
+
+def load_font(fonts, rng, size):
+    if fonts:
+        try:
+            return ImageFont.truetype(rng.choice(fonts), size)
+        except OSError:
+            pass
+    try:
+        return ImageFont.load_default(size=size)
+    except TypeError:
+        return ImageFont.load_default()
+
+
+def corrupt_warning(text, rng):
+    """Introduce the kinds of errors reviewers reject: lowercase header, dropped clause, typos."""
+    kind = rng.choice(["lowercase_header", "drop_clause", "typos"])
+    if kind == "lowercase_header":
+        return text.replace("GOVERNMENT WARNING:", "Government Warning:"), kind
+    if kind == "drop_clause":
+        return text.split(" (2)")[0], kind
+    chars = list(text)
+    for i in rng.sample(range(len(chars)), k=max(5, len(chars) // 25)):
+        if chars[i].isalpha():
+            chars[i] = rng.choice("abcdefghijklmnopqrstuvwxyz")
+    return "".join(chars), kind
+
+
+def wrap_to_width(text, font, max_px):
+    lines, line = [], ""
+    for word in text.split():
+        candidate = f"{line} {word}".strip()
+        if line and font.getlength(candidate) > max_px:
+            lines.append(line)
+            line = word
+        else:
+            line = candidate
+    return lines + ([line] if line else [])
+
+
+def render_label(fields, warning, fonts, rng):
+    w, h = rng.choice([(1200, 1800), (1000, 1500), (1400, 1400), (900, 1600)])
+    bg = rng.choice([(255, 255, 255), (250, 245, 230), (240, 240, 235)])
+    ink = rng.choice([(0, 0, 0), (30, 30, 60), (60, 20, 20)])
+    img = Image.new("RGB", (w, h), bg)
+    d = ImageDraw.Draw(img)
+    margin = int(w * 0.07)
+
+    y = int(h * rng.uniform(0.06, 0.12))
+    brand_font = load_font(fonts, rng, int(h * rng.uniform(0.045, 0.075)))
+    d.text((margin, y), fields["brand_name"], font=brand_font, fill=ink)
+    y += int(h * 0.12)
+
+    body = load_font(fonts, rng, int(h * rng.uniform(0.022, 0.03)))
+    d.text((margin, y), fields["designation"], font=body, fill=ink)
+    y = int(h * rng.uniform(0.45, 0.55))
+    d.text((margin, y), f"{fields['abv']} ALC/VOL", font=body, fill=ink)
+    d.text((margin, y + int(h * 0.05)), fields["net_contents"], font=body, fill=ink)
+    d.text((margin, y + int(h * 0.10)), f"Bottled by {fields['producer']}", font=body, fill=ink)
+
+    if warning:
+        small = load_font(fonts, rng, int(h * rng.uniform(0.014, 0.018)))
+        y = int(h * 0.74)
+        for line in wrap_to_width(warning, small, w - 2 * margin):
+            d.text((margin, y), line, font=small, fill=ink)
+            y += int(small.size * 1.3)
+    return img
+
+
+def distort(img, kinds, rng):
+    for kind in kinds:
+        if kind == "angle":
+            shear = rng.uniform(-0.15, 0.15)
+            img = img.transform(img.size, Image.AFFINE, (1, shear, -shear * img.size[1] / 2, 0, 1, 0), fillcolor=(200, 200, 200))
+        elif kind == "rotate":
+            img = img.rotate(rng.uniform(-8, 8), expand=True, fillcolor=(200, 200, 200))
+        elif kind == "blur":
+            img = img.filter(ImageFilter.GaussianBlur(rng.uniform(1.0, 2.5)))
+        elif kind == "noise":
+            arr = np.asarray(img).astype(np.int16)
+            arr += np.random.default_rng(rng.randrange(1 << 30)).normal(0, rng.uniform(10, 30), arr.shape).astype(np.int16)
+            img = Image.fromarray(np.clip(arr, 0, 255).astype(np.uint8))
+        elif kind == "dark":
+            img = ImageEnhance.Brightness(img).enhance(rng.uniform(0.35, 0.6))
+        elif kind == "glare":
+            w, h = img.size
+            cx, cy, r = rng.uniform(0.2, 0.8) * w, rng.uniform(0.2, 0.8) * h, rng.uniform(0.2, 0.4) * max(w, h)
+            yy, xx = np.mgrid[0:h, 0:w]
+            mask = np.clip(1.0 - np.hypot(xx - cx, yy - cy) / r, 0, 1)[..., None] * rng.uniform(0.5, 0.9)
+            arr = np.asarray(img).astype(np.float32)
+            img = Image.fromarray((arr * (1 - mask) + 255 * mask).astype(np.uint8))
+    return img
+
+
+def make_sample(rng, fonts, args):
+    class_type, designation = rng.choice(CLASS_TYPES)
+    app = {
+        "application_id": f"SYNTH-{rng.randrange(10**8):08d}",
+        "brand_name": f"{rng.choice(BRAND_WORDS_A)} {rng.choice(BRAND_WORDS_B)}",
+        "class_type": class_type,
+        "abv": f"{rng.choice([4.5, 5, 5.5, 6.8, 12, 12.5, 13.5, 14, 40, 43])}%",
+        "net_contents": rng.choice(NET_CONTENTS),
+        "designation": designation,
+        "producer": rng.choice(PRODUCERS),
+        "government_warning_required": True,
+        "intended_market": "Domestic",
+        "label_type": "Front Label",
+        "label_filename": "label.png",
+    }
+
+    label_fields = dict(app)
+    mismatched = []
+    if rng.random() < args.mismatch_fraction:
+        field = rng.choice(["brand_name", "abv", "net_contents"])
+        if field == "brand_name":
+            label_fields["brand_name"] = f"{rng.choice(BRAND_WORDS_A)} {rng.choice(BRAND_WORDS_B)}"
+        elif field == "abv":
+            label_fields["abv"] = f"{float(app['abv'].rstrip('%')) + rng.choice([0.5, 1.0, 2.0])}%"
+        else:
+            label_fields["net_contents"] = rng.choice([n for n in NET_CONTENTS if n != app["net_contents"]])
+        if label_fields[field] != app[field]:
+            mismatched.append(field)
+
+    warning_state, warning = "ok", WARNING_TEXT
+    r = rng.random()
+    if r < args.warning_missing_fraction:
+        warning_state, warning = "missing", None
+    elif r < args.warning_missing_fraction + args.warning_corrupt_fraction:
+        warning, kind = corrupt_warning(WARNING_TEXT, rng)
+        warning_state = f"corrupted:{kind}"
+
+    kinds = []
+    if rng.random() < args.distort_fraction:
+        kinds = rng.sample(DISTORTIONS, k=rng.randint(1, 3))
+
+    img = distort(render_label(label_fields, warning, fonts, rng), kinds, rng)
+    truth = {
+        "mismatched_fields": mismatched,
+        "warning": warning_state,
+        "distortions": kinds,
+        "expected_status": "PASS" if not mismatched and warning_state == "ok" else "NEEDS_REVIEW",
+    }
+    return app, img, truth
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--out", required=True, help="Output dataset directory")
+    ap.add_argument("--count", type=int, default=500)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--font-dir", default=None, help="Extra directory of .ttf fonts")
+    ap.add_argument("--distort-fraction", type=float, default=0.4)
+    ap.add_argument("--mismatch-fraction", type=float, default=0.15)
+    ap.add_argument("--warning-missing-fraction", type=float, default=0.05)
+    ap.add_argument("--warning-corrupt-fraction", type=float, default=0.10)
+    args = ap.parse_args()
+
+    rng = random.Random(args.seed)
+    fonts = find_fonts(args.font_dir)
+    out = Path(args.out)
+    index = []
+    for i in range(1, args.count + 1):
+        app, img, truth = make_sample(rng, fonts, args)
+        sample = f"sample_{i:05d}"
+        d = out / "synthetic" / sample
+        d.mkdir(parents=True, exist_ok=True)
+        img.save(d / "label.png")
+        (d / "application.json").write_text(json.dumps(app, indent=2), encoding="utf-8")
+        index.append({
+            "subset": "synthetic",
+            "sample": sample,
+            "label_path": f"synthetic/{sample}/label.png",
+            "application_json_path": f"synthetic/{sample}/application.json",
+            "brand_name": app["brand_name"],
+            "abv": app["abv"],
+            "net_contents": app["net_contents"],
+            "ground_truth": truth,
+        })
+        if i % 100 == 0:
+            print(f"rendered {i}/{args.count}")
+
+    (out / "index.json").write_text(json.dumps(index, indent=2), encoding="utf-8")
+    print(f"Wrote {len(index)} samples to {out.resolve()} ({len(fonts)} fonts available)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,226 @@
+"""Concurrent load / soak driver for the verification API.
+
+Replays a paired dataset (e.g. from gen_synthetic_labels.py or
+sample_data/cola_paired_dataset) against the backend at a target request
+rate and reports latency percentiles, error rate and RSS growth.
+
+Examples:
+  # against a running server, 5 req/s for 10 minutes
+  python scripts/load_test.py --dataset /tmp/synth --api http://localhost:8000 --rps 5 --duration 600
+
+  # batch endpoint, 20-label ZIPs, 0.2 batches/s
+  python scripts/load_test.py --dataset /tmp/synth --endpoint batch-pairs --batch-size 20 --rps 0.2
+
+  # start the backend in this process (so RSS is measured directly)
+  python scripts/load_test.py --dataset /tmp/synth --in-process --rps 2 --duration 300
+
+Pass --server-pid to track RSS of an external server process (Linux /proc).
+"""
+
+import argparse
+import io
+import json
+import random
+import socket
+import statistics
+import sys
+import threading
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import requests
+
+
+def rss_mb(pid=None):
+    """Resident set size in MB for pid (default: this process), or None if unavailable."""
+    try:
+        with open(f"/proc/{pid or 'self'}/status", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024.0
+    except OSError:
+        pass
+    if pid is None:
+        try:
+            import resource
+            peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            return peak / (1024.0 * 1024.0) if sys.platform == "darwin" else peak / 1024.0
+        except ImportError:
+            pass
+    return None
+
+
+def load_samples(dataset):
+    ds = Path(dataset)
+    index = json.loads((ds / "index.json").read_text(encoding="utf-8"))
+    samples = []
+    for row in index:
+        samples.append({
+            "name": f"{row.get('subset')}/{row.get('sample')}",
+            "label": (ds / row["label_path"]).read_bytes(),
+            "application": (ds / row["application_json_path"]).read_bytes(),
+        })
+    return samples
+
+
+def start_in_process_server():
+    """Run the backend with uvicorn in a daemon thread; return its base URL."""
+    sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "backend"))
+    import uvicorn
+    from app.main import app
+
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    base = f"http://127.0.0.1:{port}"
+    for _ in range(100):
+        try:
+            if requests.get(f"{base}/health", timeout=1).ok:
+                return base
+        except requests.RequestException:
+            pass
+        time.sleep(0.1)
+    raise RuntimeError("in-process server did not start")
+
+
+def make_request(args, samples, rng):
+    """Return a zero-arg callable that sends one request."""
+    if args.endpoint == "verify":
+        s = rng.choice(samples)
+        app = json.loads(s["application"])
+        data = {
+            "brand_name": app.get("brand_name", ""),
+            "abv": app.get("abv", ""),
+            "net_contents": app.get("net_contents", ""),
+            "require_gov_warning": "true" if app.get("government_warning_required", True) else "false",
+        }
+        if args.progressive:
+            data["progressive"] = "true"
+        return lambda: requests.post(f"{args.api}/api/verify", files={"file": ("label.png", s["label"], "image/png")}, data=data, timeout=args.timeout)
+
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w", zipfile.ZIP_STORED) as z:
+        for i, s in enumerate(rng.choices(samples, k=args.batch_size)):
+            z.writestr(f"item_{i:05d}/label.png", s["label"])
+            z.writestr(f"item_{i:05d}/application.json", s["application"])
+    body = buf.getvalue()
+    return lambda: requests.post(f"{args.api}/api/verify-batch-pairs", files={"zip_file": ("batch.zip", body, "application/zip")}, timeout=args.timeout)
+
+
+def pct(values, p):
+    if not values:
+        return None
+    values = sorted(values)
+    return round(values[min(len(values) - 1, int(round(p / 100.0 * (len(values) - 1))))], 1)
+
+
+def summarize(latencies, errors, sent, elapsed, rss_start, rss_now):
+    ok = len(latencies)
+    return {
+        "sent": sent,
+        "ok": ok,
+        "errors": errors,
+        "error_rate": round(errors / max(1, ok + errors), 4),
+        "achieved_rps": round((ok + errors) / max(elapsed, 1e-9), 3),
+        "latency_ms": {
+            "p50": pct(latencies, 50),
+            "p95": pct(latencies, 95),
+            "p99": pct(latencies, 99),
+            "max": round(max(latencies), 1) if latencies else None,
+            "mean": round(statistics.fmean(latencies), 1) if latencies else None,
+        },
+        "rss_mb": {"start": rss_start, "now": rss_now, "growth": round(rss_now - rss_start, 1) if rss_start is not None and rss_now is not None else None},
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--dataset", required=True, help="Dataset dir with index.json (cola_paired_dataset layout)")
+    ap.add_argument("--api", default="http://localhost:8000", help="Backend base URL")
+    ap.add_argument("--endpoint", choices=["verify", "batch-pairs"], default="verify")
+    ap.add_argument("--rps", type=float, default=2.0, help="Target requests per second (open loop)")
+    ap.add_argument("--duration", type=float, default=60.0, help="Seconds to run")
+    ap.add_argument("--concurrency", type=int, default=32, help="Max requests in flight")
+    ap.add_argument("--batch-size", type=int, default=20, help="Labels per ZIP for batch-pairs")
+    ap.add_argument("--progressive", action="store_true", help="Send progressive=true on /api/verify")
+    ap.add_argument("--timeout", type=float, default=300.0)
+    ap.add_argument("--report-every", type=float, default=10.0, help="Seconds between progress lines")
+    ap.add_argument("--in-process", action="store_true", help="Start the backend in this process")
+    ap.add_argument("--server-pid", type=int, default=None, help="PID of an external server for RSS tracking")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--out", default=None, help="Write the final report JSON here")
+    args = ap.parse_args()
+
+    samples = load_samples(args.dataset)
+    if args.in_process:
+        args.api = start_in_process_server()
+    rss_pid = None if args.in_process else args.server_pid
+    rss_of = (lambda: rss_mb(rss_pid)) if (args.in_process or args.server_pid) else (lambda: None)
+
+    rng = random.Random(args.seed)
+    lock = threading.Lock()
+    latencies, errors = [], [0]
+    inflight = threading.BoundedSemaphore(args.concurrency)
+
+    def fire(send):
+        t0 = time.perf_counter()
+        try:
+            ok = send().ok
+        except requests.RequestException:
+            ok = False
+        finally:
+            inflight.release()
+        with lock:
+            if ok:
+                latencies.append((time.perf_counter() - t0) * 1000.0)
+            else:
+                errors[0] += 1
+
+    rss_start = rss_of()
+    rss_series = [(0.0, rss_start)]
+    print(f"target {args.rps} req/s for {args.duration:.0f}s against {args.api} ({len(samples)} samples); rss={rss_start}")
+
+    start = time.perf_counter()
+    next_report = start + args.report_every
+    sent = 0
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        while True:
+            now = time.perf_counter()
+            if now - start >= args.duration:
+                break
+            due = start + sent / args.rps
+            if now < due:
+                time.sleep(min(due - now, 0.05))
+                continue
+            if not inflight.acquire(blocking=False):
+                # Saturated: the server is slower than the target rate; count as a drop.
+                with lock:
+                    errors[0] += 1
+                sent += 1
+                continue
+            pool.submit(fire, make_request(args, samples, rng))
+            sent += 1
+
+            if now >= next_report:
+                with lock:
+                    snap = summarize(list(latencies), errors[0], sent, now - start, rss_start, rss_of())
+                rss_series.append((round(now - start, 1), snap["rss_mb"]["now"]))
+                print(f"[{now - start:7.1f}s] ok={snap['ok']} err={snap['errors']} p50={snap['latency_ms']['p50']}ms p95={snap['latency_ms']['p95']}ms rss={snap['rss_mb']['now']}")
+                next_report = now + args.report_every
+
+    elapsed = time.perf_counter() - start
+    report = summarize(latencies, errors[0], sent, elapsed, rss_start, rss_of())
+    report["rss_series"] = rss_series
+    report["config"] = {k: v for k, v in vars(args).items() if k != "dataset"} | {"dataset": str(args.dataset)}
+    print(json.dumps({k: v for k, v in report.items() if k != "rss_series"}, indent=2))
+    if args.out:
+        Path(args.out).write_text(json.dumps(report, indent=2), encoding="utf-8")
+        print(f"\nWrote: {Path(args.out).resolve()}")
+
+
+if __name__ == "__main__":
+    main()
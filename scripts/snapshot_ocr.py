@@ -0,0 +1,198 @@
+"""OCR a labelled corpus once into a memory-mappable snapshot for offline tuning.
+
+  python scripts/snapshot_ocr.py build --dataset /tmp/synth --out /tmp/snap
+  python scripts/snapshot_ocr.py rescore /tmp/snap     # after changing rules/scoring; no OCR
+
+Datasets use the cola_paired_dataset layout (index.json with label_path /
+application_json_path); without an index.json every folder holding an
+application.json and a label image is used. Ground truth per sample is the
+row's "expected_status" or ground_truth.expected_status (as written by
+gen_synthetic_labels.py). Rows without one are an error unless
+--default-truth is given: treating unlabelled (e.g. distorted) samples as
+PASS would bias the tuning.
+
+Snapshot directory:
+  scores.npy         float64 [N, F] raw scores; NaN = check not applicable, -1 = no candidate
+  truth.npy          int8 [N], 1 = expected PASS, 0 = expected NEEDS_REVIEW
+  lines_bbox.npy     int32 [M, 4] line boxes (x, y, w, h) for all samples
+  lines_conf.npy     float32 [M]
+  lines_offsets.npy  int64 [N + 1]; sample i owns lines[offsets[i]:offsets[i+1]]
+  image_size.npy     int32 [N, 2] (w, h) used for extraction
+  lines_text.json    list of M line texts
+  meta.json          columns, sample names, applications and the thresholds in effect
+"""
+
+import argparse
+import json
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "backend"))
+
+from app.compare import warning_scores, warning_text  # noqa: E402
+from app.extract import best_brand_match, extract_fields  # noqa: E402
+from app.models import ApplicationFields, TextBox  # noqa: E402
+from app.pdf import label_boxes  # noqa: E402
+from app.rules import get_rules  # noqa: E402
+from app.thresholds import get_thresholds  # noqa: E402
+
+WARNING_COLUMNS = ["government_warning.header_ok", "government_warning.clause1", "government_warning.clause2", "government_warning.full"]
+LABEL_EXTS = (".png", ".jpg", ".jpeg", ".webp", ".pdf")
+
+
+def columns():
+    return ["brand_name"] + [r.field for r in get_rules().rules] + WARNING_COLUMNS
+
+
+def iter_samples(dataset, default_truth):
+    ds = Path(dataset)
+    index_path = ds / "index.json"
+    if index_path.exists():
+        rows = json.loads(index_path.read_text(encoding="utf-8"))
+        for row in rows:
+            truth = row.get("expected_status") or (row.get("ground_truth") or {}).get("expected_status") or default_truth
+            yield {
+                "name": f"{ds.name}/{row.get('subset')}/{row.get('sample')}",
+                "label": str(ds / row["label_path"]),
+                "application": json.loads((ds / row["application_json_path"]).read_text(encoding="utf-8")),
+                "truth": truth,
+            }
+        return
+    for app_path in sorted(ds.rglob("application.json")):
+        labels = sorted(p for p in app_path.parent.iterdir() if p.suffix.lower() in LABEL_EXTS)
+        if labels:
+            yield {
+                "name": str(app_path.parent.relative_to(ds.parent)),
+                "label": str(labels[0]),
+                "application": json.loads(app_path.read_text(encoding="utf-8")),
+                "truth": default_truth,
+            }
+
+
+def ocr_one(label_path):
+    boxes, _, (w, h) = label_boxes(Path(label_path).read_bytes())
+    return [(b.text, b.conf, b.bbox) for b in boxes], (w, h)
+
+
+def score_sample(app_data, boxes, size, cols):
+    """Raw per-column scores for one sample, from its line boxes."""
+    app = ApplicationFields.from_application_json(app_data)
+    ext = extract_fields(boxes, image_w=size[0], image_h=size[1])
+    row = dict.fromkeys(cols, np.nan)
+
+    best, score, _ = best_brand_match(app.brand_name, ext.brand_candidates)
+    row["brand_name"] = score if best is not None else -1.0
+    for field, s in get_rules().scores(app, ext.all_text).items():
+        row[field] = s if s is not None else -1.0
+
+    if app.require_gov_warning:
+        ws = warning_scores(warning_text(ext))
+        if ws is None:
+            row.update(dict.fromkeys(WARNING_COLUMNS, -1.0))
+            row["government_warning.header_ok"] = 0.0
+        else:
+            row["government_warning.header_ok"] = float(ws["header_ok"])
+            for k in ("clause1", "clause2", "full"):
+                row[f"government_warning.{k}"] = ws[k]
+    return [row[c] for c in cols]
+
+
+def current_thresholds():
+    th = {k: dict(v) for k, v in get_thresholds().items()}
+    for r in get_rules().rules:
+        th[r.field] = {"pass": r.pass_th, "review": r.review_th}
+    return th
+
+
+def write_scores(out, meta, boxes_per_sample, sizes):
+    cols = columns()
+    scores = np.array([score_sample(app, boxes, size, cols) for app, boxes, size in zip(meta["applications"], boxes_per_sample, sizes)], dtype=np.float64).reshape(len(sizes), len(cols))
+    np.save(out / "scores.npy", scores)
+    meta["columns"] = cols
+    meta["thresholds"] = current_thresholds()
+    (out / "meta.json").write_text(json.dumps(meta, indent=1), encoding="utf-8")
+
+
+def load_boxes(out):
+    bbox = np.load(out / "lines_bbox.npy", mmap_mode="r")
+    conf = np.load(out / "lines_conf.npy", mmap_mode="r")
+    offsets = np.load(out / "lines_offsets.npy")
+    texts = json.loads((out / "lines_text.json").read_text(encoding="utf-8"))
+    sizes = np.load(out / "image_size.npy").tolist()
+    per_sample = []
+    for i in range(len(offsets) - 1):
+        a, b = int(offsets[i]), int(offsets[i + 1])
+        per_sample.append([
+            TextBox(id=f"l{j - a + 1}", text=texts[j], conf=float(conf[j]), bbox=[int(v) for v in bbox[j]])
+            for j in range(a, b)
+        ])
+    return per_sample, sizes
+
+
+def build(args):
+    samples = [s for ds in args.dataset for s in iter_samples(ds, args.default_truth)]
+    if not samples:
+        sys.exit("no samples found")
+    unlabelled = [s["name"] for s in samples if s["truth"] is None]
+    if unlabelled:
+        sys.exit(f"{len(unlabelled)} samples have no ground truth (e.g. {', '.join(unlabelled[:3])}); "
+                 "add expected_status to the dataset or pass --default-truth")
+    bad = {s["truth"] for s in samples} - {"PASS", "NEEDS_REVIEW"}
+    if bad:
+        sys.exit(f"unknown ground-truth statuses: {sorted(bad)}")
+
+    out = Path(args.out)
+    out.mkdir(parents=True, exist_ok=True)
+    t0 = time.time()
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        ocr = list(pool.map(ocr_one, [s["label"] for s in samples], chunksize=4))
+    print(f"OCR'd {len(samples)} labels in {time.time() - t0:.1f}s")
+
+    lines = [line for boxes, _ in ocr for line in boxes]
+    offsets = np.cumsum([0] + [len(boxes) for boxes, _ in ocr]).astype(np.int64)
+    np.save(out / "lines_bbox.npy", np.array([l[2] for l in lines], dtype=np.int32).reshape(-1, 4))
+    np.save(out / "lines_conf.npy", np.array([l[1] for l in lines], dtype=np.float32))
+    np.save(out / "lines_offsets.npy", offsets)
+    np.save(out / "image_size.npy", np.array([size for _, size in ocr], dtype=np.int32).reshape(-1, 2))
+    (out / "lines_text.json").write_text(json.dumps([l[0] for l in lines]), encoding="utf-8")
+    np.save(out / "truth.npy", np.array([s["truth"] == "PASS" for s in samples], dtype=np.int8))
+
+    meta = {
+        "samples": [s["name"] for s in samples],
+        "applications": [s["application"] for s in samples],
+        "datasets": [str(d) for d in args.dataset],
+    }
+    per_sample, sizes = load_boxes(out)
+    write_scores(out, meta, per_sample, sizes)
+    print(f"Wrote snapshot of {len(samples)} samples, {len(lines)} lines to {out.resolve()}")
+
+
+def rescore(args):
+    out = Path(args.snapshot)
+    meta = json.loads((out / "meta.json").read_text(encoding="utf-8"))
+    t0 = time.time()
+    per_sample, sizes = load_boxes(out)
+    write_scores(out, meta, per_sample, sizes)
+    print(f"Rescored {len(sizes)} samples in {time.time() - t0:.1f}s")
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = ap.add_subparsers(dest="command", required=True)
+    b = sub.add_parser("build", help="OCR datasets into a new snapshot")
+    b.add_argument("--dataset", action="append", required=True, help="Dataset dir (repeatable)")
+    b.add_argument("--out", required=True, help="Snapshot directory")
+    b.add_argument("--default-truth", choices=["PASS", "NEEDS_REVIEW"], default=None, help="Status for rows without ground truth (default: refuse to build)")
+    b.add_argument("--workers", type=int, default=None, help="OCR processes (default: CPU count)")
+    r = sub.add_parser("rescore", help="Recompute scores from a snapshot's stored lines")
+    r.add_argument("snapshot")
+    args = ap.parse_args()
+    build(args) if args.command == "build" else rescore(args)
+
+
+if __name__ == "__main__":
+    main()
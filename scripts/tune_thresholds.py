@@ -0,0 +1,189 @@
+"""Sweep score thresholds against an OCR snapshot and export the chosen set.
+
+Reads a snapshot from snapshot_ocr.py (memory-mapped; no OCR, no server) and
+evaluates every combination of the swept pass thresholds at once, reporting
+precision/recall of auto-PASS against the snapshot's ground truth.
+
+Only pass thresholds decide PASS vs NEEDS_REVIEW (review thresholds only
+split REVIEW from FAIL), so those are what is swept. Checks not swept keep the
+thresholds recorded in the snapshot (or --base).
+
+  python scripts/tune_thresholds.py /tmp/snap --min-precision 0.99 --out thresholds.json
+  python scripts/tune_thresholds.py /tmp/snap --sweep brand_name=0.75:0.95:0.01 --sweep abv=0.9:1:0.01
+
+Load the result with THRESHOLDS_PATH=thresholds.json on the backend.
+"""
+
+import argparse
+import json
+import time
+from pathlib import Path
+
+import numpy as np
+
+DEFAULT_SWEEPS = {
+    "brand_name": (0.70, 1.00, 0.02),
+    "abv": (0.80, 1.00, 0.02),
+    "net_contents": (0.75, 1.00, 0.02),
+    "government_warning.clause": (0.80, 1.00, 0.02),
+    "government_warning.full": (0.76, 1.00, 0.02),
+}
+CHUNK_ROWS = 4096
+
+
+def dimension_values(scores, cols, name):
+    """Per-sample value compared against a threshold dimension (NaN = not applicable)."""
+    col = {c: scores[:, i] for i, c in enumerate(cols)}
+    if name == "government_warning.clause":
+        # PASS needs the caps+colon header and both clauses.
+        both = np.minimum(col["government_warning.clause1"], col["government_warning.clause2"])
+        return np.where(col["government_warning.header_ok"] > 0, both, np.where(np.isnan(both), np.nan, -1.0))
+    if name == "government_warning.full":
+        return col["government_warning.full"]
+    return col[name]
+
+
+def threshold_key(name):
+    """(field, key) in the thresholds config for a dimension name."""
+    if name.startswith("government_warning."):
+        return "government_warning", name.split(".", 1)[1]
+    return name, "pass"
+
+
+def pass_masks(values, grid):
+    """Bool [G, N]: sample passes this check at each grid threshold."""
+    na = np.isnan(values)
+    return (np.nan_to_num(values, nan=-np.inf)[None, :] >= grid[:, None]) | na[None, :]
+
+
+def sweep(dims, fixed, truth):
+    """Count predicted PASS and true PASS for every grid combination.
+
+    dims: list of (name, grid, masks [G, N]); fixed: bool [N] for unswept checks.
+    The last dimension is folded in with a matmul; the others are enumerated
+    in chunks, so memory stays bounded for large grids.
+    """
+    lead, (_, _, last) = dims[:-1], dims[-1]
+    lead_shape = tuple(len(g) for _, g, _ in lead)
+    n_lead = int(np.prod(lead_shape)) if lead else 1
+    last_t = last.T.astype(np.float32)  # [N, G_last]
+    truth_f = truth.astype(np.float32)
+
+    predicted = np.empty((n_lead, last.shape[0]), dtype=np.float64)
+    true_pass = np.empty_like(predicted)
+    for start in range(0, n_lead, CHUNK_ROWS):
+        stop = min(n_lead, start + CHUNK_ROWS)
+        idx = np.unravel_index(np.arange(start, stop), lead_shape) if lead else ()
+        joint = np.broadcast_to(fixed, (stop - start, fixed.shape[0])).copy()
+        for d, (_, _, masks) in enumerate(lead):
+            joint &= masks[idx[d]]
+        jf = joint.astype(np.float32)
+        predicted[start:stop] = jf @ last_t
+        true_pass[start:stop] = (jf * truth_f) @ last_t
+    shape = lead_shape + (last.shape[0],)
+    return predicted.reshape(shape), true_pass.reshape(shape)
+
+
+def parse_sweep(spec):
+    name, rng = spec.split("=", 1)
+    lo, hi, step = (float(x) for x in rng.split(":"))
+    return name, (lo, hi, step)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("snapshot", help="Snapshot dir from snapshot_ocr.py")
+    ap.add_argument("--sweep", action="append", type=parse_sweep, default=None,
+                    help="name=lo:hi:step (repeatable; default sweeps brand, ABV, net contents and the warning)")
+    ap.add_argument("--base", default=None, help="Thresholds JSON for unswept checks (default: the snapshot's)")
+    ap.add_argument("--min-precision", type=float, default=0.99, help="Required auto-PASS precision")
+    ap.add_argument("--top", type=int, default=10, help="Rows to print")
+    ap.add_argument("--out", default=None, help="Write the chosen thresholds JSON here")
+    args = ap.parse_args()
+
+    snap = Path(args.snapshot)
+    meta = json.loads((snap / "meta.json").read_text(encoding="utf-8"))
+    scores = np.load(snap / "scores.npy", mmap_mode="r")
+    truth = np.load(snap / "truth.npy").astype(bool)
+    cols = meta["columns"]
+    base = json.loads(Path(args.base).read_text(encoding="utf-8")) if args.base else meta["thresholds"]
+
+    all_dims = ["brand_name"] + [c for c in cols if "." not in c and c != "brand_name"] + ["government_warning.clause", "government_warning.full"]
+    sweeps = dict(args.sweep) if args.sweep else {k: v for k, v in DEFAULT_SWEEPS.items() if k in all_dims}
+    unknown = set(sweeps) - set(all_dims)
+    if unknown:
+        ap.error(f"unknown sweep dimensions {sorted(unknown)}; choose from {all_dims}")
+
+    t0 = time.time()
+    dims, fixed, never_pass = [], np.ones(len(truth), dtype=bool), []
+    for name in all_dims:
+        values = dimension_values(scores, cols, name)
+        field, key = threshold_key(name)
+        if name in sweeps:
+            lo, hi, step = sweeps[name]
+            grid = np.round(np.arange(lo, hi + step / 2, step), 4)
+            dims.append((name, grid, pass_masks(values, grid)))
+        else:
+            mask = pass_masks(values, np.array([base[field][key]]))[0]
+            if len(mask) and not mask.any():
+                never_pass.append(f"{name} (threshold {base[field][key]})")
+            fixed &= mask
+    if not dims:
+        ap.error("nothing to sweep")
+    if not fixed.any():
+        # No sweep can auto-PASS anything; say which unswept checks block it.
+        blockers = ", ".join(never_pass) if never_pass else "their combination"
+        print(f"No sample passes the unswept checks ({blockers}); sweep them with --sweep or relax them with --base.")
+        return
+
+    predicted, true_pass = sweep(dims, fixed, truth)
+    positives, negatives = int(truth.sum()), int((~truth).sum())
+    # Precision is undefined (NaN) where a setting auto-passes nothing.
+    precision = np.where(predicted > 0, true_pass / np.maximum(predicted, 1), np.nan)
+    recall = true_pass / max(positives, 1)
+    # Share of bad labels that are (correctly) sent to review.
+    review_recall = (negatives - (predicted - true_pass)) / max(negatives, 1)
+    elapsed = time.time() - t0
+
+    def setting(flat):
+        pos = np.unravel_index(flat, precision.shape)
+        return {name: float(grid[pos[d]]) for d, (name, grid, _) in enumerate(dims)}
+
+    def row(flat, label=""):
+        p, r, rr = precision.flat[flat], recall.flat[flat], review_recall.flat[flat]
+        vals = " ".join(f"{k}={v:.2f}" for k, v in setting(flat).items())
+        return f"{label}precision={p:.4f} recall={r:.4f} review_recall={rr:.4f}  {vals}"
+
+    print(f"{len(truth)} samples ({positives} PASS / {negatives} NEEDS_REVIEW); {precision.size} settings swept in {elapsed:.2f}s")
+
+    ok = (predicted > 0) & (np.nan_to_num(precision, nan=0.0) >= args.min_precision)
+    if not ok.any():
+        if not (predicted > 0).any():
+            print("No setting auto-passes any sample; nothing to choose from.")
+        else:
+            print(f"No setting reaches precision {args.min_precision}; best precision is {precision[predicted > 0].max():.4f}")
+        return
+    # Highest recall among settings that meet the precision floor, then highest
+    # precision, then the stricter setting (later in the grid).
+    flat_ok = ok.ravel()
+    order = np.lexsort((-np.arange(ok.size), -np.nan_to_num(precision.ravel()), -np.where(flat_ok, recall.ravel(), -1.0)))
+    order = order[flat_ok[order]][: args.top]
+    for rank, flat in enumerate(order, 1):
+        print(row(flat, f"{rank:3d}. "))
+
+    chosen = {k: dict(v) for k, v in base.items()}
+    for name, value in setting(order[0]).items():
+        field, key = threshold_key(name)
+        chosen.setdefault(field, {})[key] = value
+        # Keep review at or below pass so REVIEW stays reachable.
+        if "review" in chosen[field] and key in ("pass", "clause"):
+            chosen[field]["review"] = min(chosen[field]["review"], value)
+    if args.out:
+        Path(args.out).write_text(json.dumps(chosen, indent=2), encoding="utf-8")
+        print(f"\nWrote: {Path(args.out).resolve()}  (use THRESHOLDS_PATH={args.out})")
+    else:
+        print(json.dumps(chosen, indent=2))
+
+
+if __name__ == "__main__":
+    main()